@@ -1,8 +1,8 @@
 # Receipt entity to store the receipt information
 # This is a pure business logic entity with no database dependencies
 import uuid
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter, model_validator
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
@@ -16,21 +16,55 @@ class ReceiptStatus(str, Enum):
     FAILED = 'failed'          # Extraction or processing failed
 
 
+_CENT = Decimal('0.01')
+
+
+def _price_to_cents(price: float) -> int:
+    """Convert a float price to an integer number of cents."""
+    return int(Decimal(str(price)).quantize(_CENT) * 100)
+
+
+def _cents_to_decimal(cents: int) -> Decimal:
+    """Convert an integer number of cents back to a Decimal amount."""
+    return Decimal(cents).scaleb(-2)
+
+
 class ReceiptItem(BaseModel):
     """
     Represents a single item in a receipt.
     """
+    # Pydantic keeps field values in __dict__; an empty __slots__ avoids
+    # the extra per-instance __weakref__ slot
+    __slots__ = ()
+    
     name: str
     price: float
     quantity: Optional[int] = 1
     category: Optional[str] = 'other'
     
+    # Price in integer cents, computed once so totals use int arithmetic
+    _price_cents: int = PrivateAttr(default=0)
+    
+    def model_post_init(self, __context: Any) -> None:
+        self._price_cents = _price_to_cents(self.price)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name == 'price':
+            self._price_cents = _price_to_cents(self.price)
+    
+
+# Validates a whole list of items in one pydantic-core call
+_ITEM_LIST_ADAPTER = TypeAdapter(List[ReceiptItem])
+
 
 class Receipt(BaseModel):
     """
     Receipt entity representing a purchase receipt with items.
     Contains only business logic - no database operations.
     """
+    __slots__ = ()
+    
     receipt_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
     purchase_date: datetime = Field(default_factory=datetime.now)
@@ -41,17 +75,81 @@ class Receipt(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
     
+    TIMESTAMP_FIELDS: ClassVar[Tuple[str, ...]] = ('purchase_date', 'created_at', 'updated_at')
+    
+    # Serialization cache, invalidated whenever a field changes
+    _cached_dict: Optional[dict] = PrivateAttr(default=None)
+    _dirty: bool = PrivateAttr(default=True)
+    
+    # Items grouped by category, built on first lookup and kept in sync
+    _items_by_category: Optional[Dict[str, List[ReceiptItem]]] = PrivateAttr(default=None)
+    
+    # Running sum of the items in cents; None until first computed
+    _items_cents: Optional[int] = PrivateAttr(default=None)
+    
+    @model_validator(mode='before')
+    @classmethod
+    def _default_timestamps(cls, data: Any) -> Any:
+        """Fill missing timestamps from a single clock read so they match."""
+        if isinstance(data, dict):
+            missing = [field for field in cls.TIMESTAMP_FIELDS if field not in data]
+            if missing:
+                data = {**data, **dict.fromkeys(missing, datetime.now())}
+        return data
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            self._dirty = True
+            if name == 'items':
+                self._items_by_category = None
+                self._items_cents = None
+    
     # Business logic methods
     
     def add_item(self, item: ReceiptItem) -> None:
         """
         Add an item to the receipt and update the total.
         
+        The item's amount is added to the running sum of the items instead
+        of re-summing every item, so bulk loading stays linear. The total
+        is always set from that sum, never added on top of a stored total.
+        
         Args:
             item: The receipt item to add
         """
         self.items.append(item)
-        self.calculate_total()
+        if self._items_by_category is not None:
+            self._items_by_category.setdefault(item.category, []).append(item)
+        if self._items_cents is None:
+            self.calculate_total()
+        else:
+            self._items_cents += item._price_cents * item.quantity
+            self.total_amount = _cents_to_decimal(self._items_cents)
+    
+    def add_items(self, items: Iterable[Union[ReceiptItem, dict]]) -> None:
+        """
+        Add several items to the receipt and update the total once.
+        
+        Dictionaries (e.g. parsed from extracted receipt JSON) are validated
+        into ReceiptItem objects in a single batch.
+        
+        Args:
+            items: Receipt items or dictionaries with item fields
+        """
+        new_items = _ITEM_LIST_ADAPTER.validate_python(list(items))
+        if not new_items:
+            return
+        
+        self.items.extend(new_items)
+        if self._items_by_category is not None:
+            for item in new_items:
+                self._items_by_category.setdefault(item.category, []).append(item)
+        if self._items_cents is None:
+            self.calculate_total()
+        else:
+            self._items_cents += sum(item._price_cents * item.quantity for item in new_items)
+            self.total_amount = _cents_to_decimal(self._items_cents)
     
     def remove_item(self, item_name: str) -> bool:
         """
@@ -63,28 +161,55 @@ class Receipt(BaseModel):
         Returns:
             True if item was removed, False if not found
         """
-        initial_length = len(self.items)
-        self.items = [item for item in self.items if item.name != item_name]
+        removed = False
+        removed_cents = 0
+        # Delete matches in place, iterating backwards so indices stay valid
+        for i in range(len(self.items) - 1, -1, -1):
+            item = self.items[i]
+            if item.name == item_name:
+                del self.items[i]
+                removed_cents += item._price_cents * item.quantity
+                removed = True
         
-        if len(self.items) < initial_length:
+        if not removed:
+            return False
+        
+        self._items_by_category = None
+        if self._items_cents is None:
             self.calculate_total()
-            return True
-        return False
+        else:
+            self._items_cents -= removed_cents
+            self.total_amount = _cents_to_decimal(self._items_cents)
+        return True
     
     def calculate_total(self) -> Decimal:
         """
         Calculate and update the total amount from all items.
         
+        The items are summed once; after that add_item, add_items and
+        remove_item keep the running sum current, so repeated calls are O(1).
+        
         Returns:
             The calculated total
         """
-        total = Decimal(0)
-        for item in self.items:
-            total += Decimal(str(item.price)) * item.quantity
+        if self._items_cents is None:
+            self._items_cents = sum(item._price_cents * item.quantity for item in self.items)
+        total = _cents_to_decimal(self._items_cents)
         
         self.total_amount = total
         return total
     
+    def invalidate(self) -> None:
+        """
+        Drop the running item total and category index.
+        
+        Call this after mutating items in place (e.g. changing an item's
+        price or quantity) so the next calculation starts from scratch.
+        """
+        self._items_cents = None
+        self._items_by_category = None
+        self._dirty = True
+    
     def update_fields(self, **kwargs) -> None:
         """
         Update receipt fields.
@@ -92,8 +217,9 @@ class Receipt(BaseModel):
         Args:
             **kwargs: Fields to update
         """
+        fields = type(self).model_fields
         for key, value in kwargs.items():
-            if hasattr(self, key):
+            if key in fields:
                 setattr(self, key, value)
         
         # Always update the timestamp when fields change
@@ -118,7 +244,13 @@ class Receipt(BaseModel):
         Returns:
             List of items in the category
         """
-        return [item for item in self.items if item.category == category]
+        if self._items_by_category is None:
+            index: Dict[str, List[ReceiptItem]] = {}
+            for item in self.items:
+                index.setdefault(item.category, []).append(item)
+            self._items_by_category = index
+        
+        return list(self._items_by_category.get(category, ()))
     
     def get_summary(self) -> dict:
         """
@@ -133,5 +265,46 @@ class Receipt(BaseModel):
             'purchase_date': self.purchase_date,
             'total_amount': float(self.total_amount),
             'item_count': len(self.items),
-            'categories': list(set(item.category for item in self.items))
-        }
\ No newline at end of file
+            'categories': list({item.category for item in self.items})
+        }
+    
+    def to_dict(self) -> dict:
+        """
+        Serialize the receipt to a JSON-compatible dictionary.
+        
+        The result is memoized until a field changes, so repeated
+        serializations of an unchanged receipt only cost a dict copy.
+        Mutating ``items`` in place (instead of using ``add_item`` /
+        ``remove_item``) bypasses the cache.
+        
+        Returns:
+            Dictionary with datetimes as ISO strings and Decimals as strings
+        """
+        if self._dirty or self._cached_dict is None:
+            self._cached_dict = self.model_dump(mode='json')
+            self._dirty = False
+        return dict(self._cached_dict)
+    
+    def items_to_json(self) -> str:
+        """
+        Serialize only the items to a compact JSON array.
+        
+        Runs in pydantic-core in one pass, without building the
+        intermediate list of dictionaries first.
+        
+        Returns:
+            JSON array of the receipt's items
+        """
+        return _ITEM_LIST_ADAPTER.dump_json(self.items).decode('utf-8')
+    
+    def to_json(self) -> bytes:
+        """
+        Serialize the receipt straight to JSON bytes.
+        
+        Uses pydantic-core's serializer in a single pass, without building
+        an intermediate dictionary first.
+        
+        Returns:
+            UTF-8 encoded JSON document
+        """
+        return self.model_dump_json().encode('utf-8')
@@ -1,29 +1,126 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
+import asyncio
 import os
-from dotenv import load_dotenv
 import logging
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 import base64
+import hashlib
+import io
+import json
+import re
+from PIL import Image, ImageOps
+from collections import OrderedDict
+from functools import lru_cache
 
-# Set your API key
+# Create the OpenAI client on first use and share it (and its connection pool)
+@lru_cache(maxsize=1)
+def get_client():
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# Load the image and encode it as base64
-def encode_image_to_base64(image_path):
+# Load the image and encode it as base64; accepts a file path or the raw image bytes
+def encode_image_to_base64(image):
+    if isinstance(image, (bytes, bytearray)):
+        return _encode_bytes_to_base64(image)
+    # Key the cache on mtime and size too, so a rewritten file is re-encoded
+    stat = os.stat(image)
+    return _encode_file_to_base64(image, stat.st_mtime_ns, stat.st_size)
+
+# Longest side sent to the vision model; larger photos are downscaled first
+MAX_IMAGE_SIDE = 1568
+JPEG_QUALITY = 85
+
+# Small JPEGs are sent as-is; anything else is resized and re-encoded
+def _needs_reencode(img):
+    return img.format != "JPEG" or max(img.size) > MAX_IMAGE_SIDE
+
+def _reencode(img):
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    buffer = io.BytesIO()
+    img.convert("RGB").save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer
+
+def _reencode_to_base64(img):
+    return base64.b64encode(_reencode(img).getbuffer()).decode("ascii")
+
+# Shrink raw image bytes to what the vision model uses, so the smaller JPEG
+# can be stored and sent instead of the original; small JPEGs come back as-is
+def shrink_image(data):
+    with Image.open(io.BytesIO(data)) as img:
+        if not _needs_reencode(img):
+            return data
+        return _reencode(img).getvalue()
+
+# Encoded images are large, so only keep a handful of recent ones
+@lru_cache(maxsize=16)
+def _encode_file_to_base64(image_path, mtime_ns, size):
+    with Image.open(image_path) as img:
+        if _needs_reencode(img):
+            return _reencode_to_base64(img)
+    # Read straight into a buffer of the known size to avoid an extra copy
+    buf = bytearray(size)
+    with open(image_path, "rb") as f:
+        f.readinto(buf)
+    return base64.b64encode(memoryview(buf)).decode("ascii")
+
+def _encode_bytes_to_base64(data):
+    with Image.open(io.BytesIO(data)) as img:
+        if _needs_reencode(img):
+            return _reencode_to_base64(img)
+    return base64.b64encode(data).decode("ascii")
+
+# Extraction results keyed by SHA-256 of the image, so re-uploads of the
+# same receipt skip the GPT call. Least recently used entries are evicted.
+_EXTRACTION_CACHE_SIZE = 256
+_extraction_cache = OrderedDict()
+
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Key the cache on the original image bytes, so changing how images are
+# re-encoded for the API does not make existing entries unreachable
+def _image_cache_key(image):
+    if isinstance(image, (bytes, bytearray)):
+        return hashlib.sha256(image).hexdigest()
+    stat = os.stat(image)
+    return _file_cache_key(image, stat.st_mtime_ns, stat.st_size)
+
+@lru_cache(maxsize=64)
+def _file_cache_key(image_path, mtime_ns, size):
     with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+# Only replies holding a parsable JSON object are cached; a bad reply
+# must not be served again when the user re-sends the same photo
+def _is_json_reply(result):
+    if not result:
+        return False
+    match = _JSON_OBJECT_RE.search(result)
+    if not match:
+        return False
+    try:
+        json.loads(match.group())
+    except json.JSONDecodeError:
+        return False
+    return True
 
-# Prepare the API request
-def extract_receipt_text(image_path):
-    base64_image = encode_image_to_base64(image_path)
-    logger.info(f"Extracting text from image: {image_path}")
+# Prepare the API request; image is a file path or the raw image bytes
+async def extract_receipt_text(image):
+    cache_key = _image_cache_key(image)
+    
+    cached = _extraction_cache.get(cache_key)
+    if cached is not None:
+        _extraction_cache.move_to_end(cache_key)
+        logger.info(f"Using cached extraction for image: {cache_key}")
+        return cached
+    
+    logger.info(f"Extracting text from image: {cache_key}")
+    base64_image = encode_image_to_base64(image)
     
     try:
-        response = client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {
@@ -46,14 +143,26 @@ def extract_receipt_text(image_path):
         )
         
         result = response.choices[0].message.content
-        logger.info(f"GPT extraction successful: {len(result)} characters")
+        logger.info(f"GPT extraction successful: {len(result or '')} characters")
+        
+        if _is_json_reply(result):
+            _extraction_cache[cache_key] = result
+            if len(_extraction_cache) > _EXTRACTION_CACHE_SIZE:
+                _extraction_cache.popitem(last=False)
+        else:
+            logger.warning(f"Not caching unparsable extraction for image: {cache_key}")
         return result
     except Exception as e:
         logger.error(f"GPT extraction failed: {str(e)}")
         raise
 
+# Extract several receipts concurrently; the API calls overlap instead of running back to back
+async def extract_receipts_text(image_paths):
+    return await asyncio.gather(*(extract_receipt_text(path) for path in image_paths))
+
 # Example usage
 if __name__ == "__main__":
-    receipt_text = extract_receipt_text("tickets/w2.jpg")
+    from dotenv import load_dotenv
+    load_dotenv()
+    receipt_text = asyncio.run(extract_receipt_text("tickets/w2.jpg"))
     print(receipt_text)
-21
\ No newline at end of file
@@ -1,11 +1,16 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import asyncio
 import logging
 import os
-import tempfile
 from services.upload.upload import UploadServiceFactory
 from services.authentication.authenticate import AuthenticationService
 from typing import Optional
+from dotenv import load_dotenv
+
+# Entry point (also served directly as main:app): read .env once,
+# before the services below look up their settings
+load_dotenv()
 
 # Initialize the services
 upload_service = UploadServiceFactory.create()
@@ -62,18 +67,9 @@ async def upload(file: UploadFile = File(...), current_user: dict = Depends(get_
         HTTPException: If there's an error uploading the file
     """
     try:
-        # Create a temporary file to store the upload
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            # Write the uploaded file content to the temporary file
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        # Upload the temporary file to S3
-        url = upload_service.upload_file(temp_file_path, file.filename)
-        
-        # Clean up the temporary file
-        os.unlink(temp_file_path)
+        # Stream the upload's spooled file straight to S3, without a temp file copy.
+        # boto3 blocks, so run it in a worker thread to keep the event loop free.
+        url = await asyncio.to_thread(upload_service.upload_fileobj, file.file, file.filename)
         
         return {
             "message": "File uploaded successfully", 
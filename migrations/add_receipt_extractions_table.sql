@@ -0,0 +1,19 @@
+-- Create receipt_extractions table caching GPT extraction results
+-- Migration: add_receipt_extractions_table
+-- Used by GptExtract when it is given a cache_store
+--
+-- DynamoDB equivalent: a table named receipt_extractions with partition
+-- key cache_key (String), with TTL enabled on the expires_at attribute
+
+CREATE TABLE IF NOT EXISTS receipt_extractions (
+    cache_key VARCHAR(32) PRIMARY KEY,
+    response TEXT NOT NULL,
+    -- Unix time after which the entry is ignored
+    expires_at BIGINT NOT NULL
+);
+
+-- Lets expired entries be purged with a range delete
+CREATE INDEX IF NOT EXISTS idx_receipt_extractions_expires_at ON receipt_extractions(expires_at);
+
+-- Optional cleanup, e.g. from a periodic job:
+-- DELETE FROM receipt_extractions WHERE expires_at < EXTRACT(EPOCH FROM NOW());
@@ -2,7 +2,16 @@ from PIL import Image, ImageEnhance, ImageFilter
 import pytesseract
 import cv2
 import numpy as np
+import os
 
+# Opt-in Numba thresholding (mean window instead of Gaussian), see
+# services/process_text/_threshold_numba.py. Slower than cv2 on most
+# hosts; numba is an optional dependency. Only explicit true values count
+USE_NUMBA_OCR = os.environ.get("USE_NUMBA_OCR", "").strip().lower() in ("1", "true", "yes", "on")
+
+# Preprocessing deliberately stays on the CPU: cv2.cuda has no
+# adaptiveThreshold, so a GPU path would upload the image only for the
+# grayscale conversion and download it again before thresholding.
 def preprocess_image(path):
     # Load image in OpenCV
     image = cv2.imread(path)
@@ -14,24 +23,25 @@ def preprocess_image(path):
     blurred = cv2.GaussianBlur(gray, (5, 5), 0)
 
     # Adaptive threshold
-    thresh = cv2.adaptiveThreshold(
-        blurred, 255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY_INV,
-        11, 2
-    )
-
-    # Save temp preprocessed image
-    temp_path = "temp_processed.png"
-    cv2.imwrite(temp_path, thresh)
-
-    return temp_path
+    if USE_NUMBA_OCR:
+        from services.process_text._threshold_numba import adaptive_thresh
+        thresh = adaptive_thresh(blurred, 11, 2)
+    else:
+        thresh = cv2.adaptiveThreshold(
+            blurred, 255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY_INV,
+            11, 2
+        )
+
+    # Return the array directly; no temp file round-trip
+    return thresh
 
 def extract_text(image_path):
     processed = preprocess_image(image_path)
     custom_config = r'--oem 3 --psm 6'
 
-    text = pytesseract.image_to_string(Image.open(processed), config=custom_config)
+    text = pytesseract.image_to_string(Image.fromarray(processed), config=custom_config)
 
     return text
 
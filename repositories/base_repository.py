@@ -2,8 +2,13 @@
 Base repository interface and abstract class for data access layer.
 This module defines the contract for repository implementations.
 """
+import asyncio
+import contextvars
+import functools
+import os
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic, Optional, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar, Generic, Optional, List, Dict, Any, Callable
 
 T = TypeVar('T')
 
@@ -26,6 +31,19 @@ class IRepository(ABC, Generic[T]):
         """
         pass
     
+    @abstractmethod
+    def save_many(self, entities: List[T]) -> List[T]:
+        """
+        Save several entities using bulk writes where the backend supports them.
+        
+        Args:
+            entities: The entities to save
+            
+        Returns:
+            The saved entities
+        """
+        pass
+    
     @abstractmethod
     def find_by_id(self, entity_id: str) -> Optional[T]:
         """
@@ -39,6 +57,19 @@ class IRepository(ABC, Generic[T]):
         """
         pass
     
+    @abstractmethod
+    def find_by_ids(self, entity_ids: List[str]) -> Dict[str, T]:
+        """
+        Find several entities by their IDs.
+        
+        Args:
+            entity_ids: The IDs of the entities
+            
+        Returns:
+            Dictionary mapping each found ID to its entity
+        """
+        pass
+    
     @abstractmethod
     def find_all(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[T]:
         """
@@ -94,6 +125,58 @@ class BaseRepository(IRepository[T], ABC):
             table_name: The name of the database table
         """
         self.table_name = table_name
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    async def _run_async(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking repository call without blocking the event loop.
+        
+        Calls run on a per-repository thread pool sized to the connection
+        pool (POSTGRES_POOL_MAX), so concurrent calls each use their own
+        pooled connection instead of queueing behind one worker thread.
+        The caller's context variables are carried over to the worker.
+        
+        Args:
+            func: The blocking callable to run
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+            
+        Returns:
+            The callable's return value
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('POSTGRES_POOL_MAX', 20)),
+                thread_name_prefix=f"{self.table_name}_repository"
+            )
+        
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+    
+    async def asave(self, entity: T) -> T:
+        """Async variant of save()."""
+        return await self._run_async(self.save, entity)
+    
+    async def asave_many(self, entities: List[T]) -> List[T]:
+        """Async variant of save_many()."""
+        return await self._run_async(self.save_many, entities)
+    
+    async def afind_by_id(self, entity_id: str) -> Optional[T]:
+        """Async variant of find_by_id()."""
+        return await self._run_async(self.find_by_id, entity_id)
+    
+    async def afind_all(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[T]:
+        """Async variant of find_all()."""
+        return await self._run_async(self.find_all, filters, limit)
+    
+    async def adelete(self, entity_id: str) -> bool:
+        """Async variant of delete()."""
+        return await self._run_async(self.delete, entity_id)
+    
+    async def aexists(self, entity_id: str) -> bool:
+        """Async variant of exists()."""
+        return await self._run_async(self.exists, entity_id)
     
     @abstractmethod
     def _to_entity(self, data: Dict[str, Any]) -> T:
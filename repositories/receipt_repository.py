@@ -2,13 +2,22 @@
 Receipt repository implementation with support for DynamoDB and PostgreSQL.
 Handles all database operations for Receipt entities.
 """
+import csv
+import io
+import json
 import logging
-from typing import Optional, List, Dict, Any
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
 from datetime import datetime
 from decimal import Decimal
 
 from repositories.base_repository import BaseRepository
-from entities.receipt import Receipt, ReceiptItem
+from entities.receipt import Receipt, ReceiptItem, ReceiptStatus
 from services.store_data.store_data import StoreDataInterface, DynamoDBStoreDataService, PostgresStoreDataService
 
 
@@ -16,12 +25,29 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+@lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO timestamp, reusing results for repeated strings."""
+    return datetime.fromisoformat(value)
+
+
 class ReceiptRepository(BaseRepository[Receipt]):
     """
     Repository for Receipt entities. Handles all database interactions
     while keeping business logic in the Receipt entity.
     """
     
+    # Column order used for COPY bulk loads and prepared statements
+    _RECEIPT_COLUMNS = (
+        'receipt_id', 'user_id', 'purchase_date', 'total_amount',
+        'image_url', 'status', 'created_at', 'updated_at'
+    )
+    _ITEM_COLUMNS = ('receipt_id', 'name', 'price', 'quantity', 'category')
+    
+    # Read-through cache bounds for find_by_id
+    CACHE_TTL_SECONDS = 30
+    CACHE_MAX_SIZE = 1024
+    
     def __init__(self, store_service: StoreDataInterface, table_name: str = 'receipts'):
         """
         Initialize the receipt repository.
@@ -32,6 +58,57 @@ class ReceiptRepository(BaseRepository[Receipt]):
         """
         super().__init__(table_name)
         self.store_service = store_service
+        # Rows queued by save() while a batch() block is active, keyed by
+        # receipt ID so a receipt saved twice is only written once
+        self._pending_batch: ContextVar[Optional[Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]]]] = ContextVar(
+            f'receipt_batch_{id(self)}', default=None
+        )
+        # receipt_id -> (expiry, Receipt); copies are handed out so callers
+        # can't mutate the cached entity
+        self._cache: "OrderedDict[str, Tuple[float, Receipt]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Row serializer for this backend, picked once instead of per save
+        self._to_row = (
+            self._to_dict_postgres if isinstance(store_service, PostgresStoreDataService)
+            else self._to_dict_dynamo
+        )
+    
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Buffer save() calls and write them in bulk when the block exits.
+        
+        Receipts saved inside the block are written with one bulk write per
+        table instead of one write per receipt; on PostgreSQL the whole
+        flush is a single transaction. Nothing is written if the block
+        raises. Nested blocks join the outer batch.
+        
+        Example:
+            with repo.batch():
+                for receipt in receipts:
+                    repo.save(receipt)
+        """
+        if self._pending_batch.get() is not None:
+            yield
+            return
+        
+        pending: Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]] = {}
+        token = self._pending_batch.set(pending)
+        try:
+            yield
+        finally:
+            self._pending_batch.reset(token)
+        
+        if not pending:
+            return
+        
+        logger.info(f"Flushing {len(pending)} buffered receipts to {self.table_name}")
+        if isinstance(self.store_service, PostgresStoreDataService):
+            self._flush_postgres(list(pending.values()))
+        else:
+            self.store_service.batch_save(self.table_name, [row for row, _ in pending.values()])
+        for receipt_id in pending:
+            self._evict_cached(receipt_id)
     
     def save(self, entity: Receipt) -> Receipt:
         """
@@ -46,14 +123,21 @@ class ReceiptRepository(BaseRepository[Receipt]):
         Raises:
             ValueError: If required fields are missing
         """
-        # Validate required fields
-        if not entity.receipt_id:
-            raise ValueError("Receipt ID is required")
-        if not entity.user_id:
-            raise ValueError("User ID is required")
-        if not entity.image_url:
+        # Validate required fields; is_valid() covers the happy path in one
+        # check and the specific field is only looked up on failure
+        if not entity.is_valid():
+            if not entity.receipt_id:
+                raise ValueError("Receipt ID is required")
+            if not entity.user_id:
+                raise ValueError("User ID is required")
             raise ValueError("Image URL is required")
         
+        pending = self._pending_batch.get()
+        if pending is not None:
+            self._queue_for_batch(pending, entity)
+            logger.info(f"Queued receipt {entity.receipt_id} for batch save")
+            return entity
+        
         logger.info(f"Saving receipt {entity.receipt_id} to database")
         
         # Check if using PostgreSQL (which has separate tables for items)
@@ -61,13 +145,150 @@ class ReceiptRepository(BaseRepository[Receipt]):
             self._save_postgres(entity)
         else:
             # DynamoDB stores items as embedded documents
-            data_to_store = self._to_dict(entity)
+            data_to_store = self._to_row(entity)
             self.store_service.save(table_name=self.table_name, data=data_to_store)
+        self._evict_cached(entity.receipt_id)
         
         logger.info(f"Successfully saved receipt {entity.receipt_id}")
         
         return entity
     
+    def save_many(self, entities: List[Receipt]) -> List[Receipt]:
+        """
+        Save several receipts with one bulk write per table.
+        
+        For PostgreSQL this is one multi-row upsert for the receipts and
+        one INSERT for all of their items, in a single transaction. On
+        DynamoDB the receipts go through BatchWriteItem.
+        
+        Args:
+            entities: The Receipts to save
+            
+        Returns:
+            The saved Receipts
+            
+        Raises:
+            ValueError: If required fields are missing on any receipt
+        """
+        entities = list(entities)
+        with self.batch():
+            for entity in entities:
+                self.save(entity)
+        return entities
+    
+    def bulk_load(self, entities: Iterable[Receipt]) -> int:
+        """
+        Bulk-load receipts (e.g. a historical import) using PostgreSQL COPY.
+        
+        Receipts and items are streamed with COPY FROM STDIN inside a single
+        transaction with synchronous_commit disabled, which is much faster
+        than INSERTs for large imports. Other backends fall back to save_many.
+        
+        Args:
+            entities: The Receipts to load
+            
+        Returns:
+            The number of receipts loaded
+            
+        Raises:
+            ValueError: If required fields are missing on any receipt
+        """
+        entities = list(entities)
+        if not isinstance(self.store_service, PostgresStoreDataService):
+            return len(self.save_many(entities))
+        if not entities:
+            return 0
+        
+        receipts_csv = io.StringIO()
+        items_csv = io.StringIO()
+        receipts_writer = csv.writer(receipts_csv)
+        items_writer = csv.writer(items_csv)
+        
+        for entity in entities:
+            if not entity.is_valid():
+                raise ValueError(f"Receipt {entity.receipt_id or '<missing id>'} is missing required fields")
+            data = self._to_row(entity)
+            receipts_writer.writerow([data[column] for column in self._RECEIPT_COLUMNS])
+            for row in self._item_rows(entity.receipt_id, entity.items):
+                items_writer.writerow([row[column] for column in self._ITEM_COLUMNS])
+        
+        receipts_csv.seek(0)
+        items_csv.seek(0)
+        
+        try:
+            logger.info(f"Bulk loading {len(entities)} receipts with COPY")
+            with self.store_service.get_cursor() as cursor:
+                cursor.execute("SET LOCAL synchronous_commit = OFF")
+                cursor.copy_expert(
+                    f"COPY {self.table_name} ({', '.join(self._RECEIPT_COLUMNS)}) FROM STDIN WITH CSV",
+                    receipts_csv
+                )
+                cursor.copy_expert(
+                    f"COPY receipt_items ({', '.join(self._ITEM_COLUMNS)}) FROM STDIN WITH CSV",
+                    items_csv
+                )
+        except Exception as e:
+            logger.error(f"Error bulk loading receipts: {str(e)}")
+            raise
+        
+        for entity in entities:
+            self._evict_cached(entity.receipt_id)
+        logger.info(f"Successfully bulk loaded {len(entities)} receipts")
+        return len(entities)
+    
+    def _queue_for_batch(self, pending: Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]], entity: Receipt) -> None:
+        """
+        Add a receipt's rows to the active batch buffer.
+        
+        Args:
+            pending: The batch buffer keyed by receipt ID
+            entity: The Receipt to queue
+        """
+        item_rows: List[Dict[str, Any]] = []
+        if isinstance(self.store_service, PostgresStoreDataService) and entity.items:
+            item_rows = self._item_rows(entity.receipt_id, entity.items)
+        pending[entity.receipt_id] = (self._to_row(entity), item_rows)
+    
+    def _flush_postgres(self, queued: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> None:
+        """
+        Write buffered receipts and their items to PostgreSQL in one transaction.
+        
+        Receipts are upserted with one multi-row statement, their old items
+        deleted with one statement and the new items inserted with another.
+        
+        Args:
+            queued: (receipt row, item rows) pairs to write
+        """
+        from psycopg2.extras import execute_values
+        
+        columns = ', '.join(self._RECEIPT_COLUMNS)
+        updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in self._RECEIPT_COLUMNS[1:])
+        receipt_values = [tuple(row[column] for column in self._RECEIPT_COLUMNS) for row, _ in queued]
+        item_values = [
+            tuple(item[column] for column in self._ITEM_COLUMNS)
+            for _, items in queued for item in items
+        ]
+        
+        with self.store_service.get_cursor() as cursor:
+            execute_values(
+                cursor,
+                f"INSERT INTO {self.table_name} ({columns}) VALUES %s "
+                f"ON CONFLICT (receipt_id) DO UPDATE SET {updates}",
+                receipt_values,
+                page_size=500
+            )
+            cursor.execute(
+                "DELETE FROM receipt_items WHERE receipt_id = ANY(%s)",
+                ([row['receipt_id'] for row, _ in queued],)
+            )
+            if item_values:
+                execute_values(
+                    cursor,
+                    f"INSERT INTO receipt_items ({', '.join(self._ITEM_COLUMNS)}) VALUES %s",
+                    item_values,
+                    page_size=500
+                )
+    
     def _save_postgres(self, entity: Receipt) -> None:
         """
         Save receipt to PostgreSQL with separate items table.
@@ -75,41 +296,121 @@ class ReceiptRepository(BaseRepository[Receipt]):
         Args:
             entity: The Receipt to save
         """
-        # Save receipt without items
-        receipt_data = self._to_dict(entity, include_items=False)
-        self.store_service.save(table_name=self.table_name, data=receipt_data)
+        # Save receipt without items, through the prepared upsert statement,
+        # and its items in the same transaction
+        receipt_data = self._to_row(entity)
+        placeholders = ', '.join(['%s'] * len(self._RECEIPT_COLUMNS))
+        with self.store_service.get_cursor() as cursor:
+            self._prepare_statements(cursor)
+            cursor.execute(
+                f"EXECUTE {self._upsert_statement_name} ({placeholders})",
+                tuple(receipt_data[column] for column in self._RECEIPT_COLUMNS)
+            )
+            if entity.items:
+                self._write_receipt_items(cursor, entity.receipt_id, entity.items)
+    
+    @property
+    def _upsert_statement_name(self) -> str:
+        return f"upsert_{self.table_name}"
+    
+    @property
+    def _replace_items_statement_name(self) -> str:
+        return f"replace_items_{self.table_name}"
+    
+    def _prepare_statements(self, cursor) -> None:
+        """
+        PREPARE the receipt upsert and item replacement once per PostgreSQL connection.
         
-        # Save items separately if any exist
-        if entity.items:
-            self._save_receipt_items(entity.receipt_id, entity.items)
+        The server parses and plans the statements once; every save then
+        only sends an EXECUTE with the parameters.
+        
+        Args:
+            cursor: Cursor on the connection that will execute the statements
+        """
+        # Prepared statements live on the connection, so which ones exist is
+        # tracked by the store per connection; another repository on the
+        # same pool must not PREPARE them a second time
+        prepared = self.store_service.prepared_statements(cursor.connection)
+        if self._upsert_statement_name in prepared:
+            return
+        
+        columns = ', '.join(self._RECEIPT_COLUMNS)
+        params = ', '.join(f"${i}" for i in range(1, len(self._RECEIPT_COLUMNS) + 1))
+        updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in self._RECEIPT_COLUMNS[1:])
+        cursor.execute(
+            f"PREPARE {self._upsert_statement_name} AS "
+            f"INSERT INTO {self.table_name} ({columns}) VALUES ({params}) "
+            f"ON CONFLICT (receipt_id) DO UPDATE SET {updates}"
+        )
+        
+        # Delete and insert in one statement; the items arrive as one array
+        # per column and are expanded server-side with unnest
+        cursor.execute(
+            f"PREPARE {self._replace_items_statement_name} "
+            "(varchar, varchar[], numeric[], integer[], varchar[]) AS "
+            "WITH deleted AS (DELETE FROM receipt_items WHERE receipt_id = $1) "
+            f"INSERT INTO receipt_items ({', '.join(self._ITEM_COLUMNS)}) "
+            "SELECT $1, u.name, u.price, u.quantity, u.category "
+            "FROM unnest($2, $3, $4, $5) AS u(name, price, quantity, category)"
+        )
+        prepared.update((self._upsert_statement_name, self._replace_items_statement_name))
     
     def _save_receipt_items(self, receipt_id: str, items: List[ReceiptItem]) -> None:
         """
-        Save receipt items to the receipt_items table.
+        Replace the items of a receipt in the receipt_items table.
         
         Args:
             receipt_id: The receipt ID
             items: List of receipt items
         """
-        # First, delete existing items for this receipt (for update case)
-        try:
-            self.store_service.cursor.execute(
-                "DELETE FROM receipt_items WHERE receipt_id = %s",
-                (receipt_id,)
+        with self.store_service.get_cursor() as cursor:
+            self._write_receipt_items(cursor, receipt_id, items)
+    
+    def _write_receipt_items(self, cursor, receipt_id: str, items: List[ReceiptItem]) -> None:
+        """
+        Delete a receipt's items and insert the new ones, without committing.
+        
+        Both happen in a single prepared statement, so replacing the items
+        of a receipt is one round trip however many items it has.
+        
+        Args:
+            cursor: Cursor of the enclosing transaction
+            receipt_id: The receipt ID
+            items: List of receipt items
+        """
+        self._prepare_statements(cursor)
+        cursor.execute(
+            f"EXECUTE {self._replace_items_statement_name} (%s, %s, %s, %s, %s)",
+            (
+                receipt_id,
+                [item.name for item in items],
+                [float(item.price) for item in items],
+                [item.quantity for item in items],
+                [item.category for item in items],
             )
-        except Exception as e:
-            logger.warning(f"Could not delete existing items: {e}")
+        )
+    
+    def _item_rows(self, receipt_id: str, items: List[ReceiptItem]) -> List[Dict[str, Any]]:
+        """
+        Build receipt_items rows for the given items.
         
-        # Insert new items
-        for item in items:
-            item_data = {
+        Args:
+            receipt_id: The receipt ID
+            items: List of receipt items
+            
+        Returns:
+            List of row dictionaries for the receipt_items table
+        """
+        return [
+            {
                 'receipt_id': receipt_id,
                 'name': item.name,
                 'price': float(item.price),
                 'quantity': item.quantity,
                 'category': item.category
             }
-            self.store_service.save(table_name='receipt_items', data=item_data)
+            for item in items
+        ]
     
     def find_by_id(self, receipt_id: str) -> Optional[Receipt]:
         """
@@ -121,17 +422,21 @@ class ReceiptRepository(BaseRepository[Receipt]):
         Returns:
             The Receipt if found, None otherwise
         """
+        cached = self._get_cached(receipt_id)
+        if cached is not None:
+            return cached
+        
         try:
             logger.info(f"Finding receipt by ID: {receipt_id}")
-            data = self.store_service.get(self.table_name, {'receipt_id': receipt_id})
+            if isinstance(self.store_service, PostgresStoreDataService):
+                data = self._get_with_items(receipt_id)
+            else:
+                data = self.store_service.get(self.table_name, {'receipt_id': receipt_id})
             
             if data:
-                # If using PostgreSQL, load items separately
-                if isinstance(self.store_service, PostgresStoreDataService):
-                    items = self._load_receipt_items(receipt_id)
-                    data['items'] = items
-                
-                return self._to_entity(data)
+                receipt = self._to_entity(data)
+                self._put_cached(receipt)
+                return receipt
             
             logger.info(f"Receipt {receipt_id} not found")
             return None
@@ -139,69 +444,249 @@ class ReceiptRepository(BaseRepository[Receipt]):
             logger.error(f"Error finding receipt {receipt_id}: {str(e)}")
             raise
     
-    def _load_receipt_items(self, receipt_id: str) -> List[Dict[str, Any]]:
+    def _get_cached(self, receipt_id: str) -> Optional[Receipt]:
+        """Return a copy of a cached, unexpired receipt, or None."""
+        with self._cache_lock:
+            cached = self._cache.get(receipt_id)
+            if cached is None:
+                return None
+            expires_at, receipt = cached
+            if expires_at <= time.monotonic():
+                del self._cache[receipt_id]
+                return None
+            self._cache.move_to_end(receipt_id)
+        return receipt.model_copy(deep=True)
+    
+    def _put_cached(self, receipt: Receipt) -> None:
+        """Cache a copy of a receipt loaded from the store."""
+        entry = (time.monotonic() + self.CACHE_TTL_SECONDS, receipt.model_copy(deep=True))
+        with self._cache_lock:
+            self._cache[receipt.receipt_id] = entry
+            self._cache.move_to_end(receipt.receipt_id)
+            while len(self._cache) > self.CACHE_MAX_SIZE:
+                self._cache.popitem(last=False)
+    
+    def _evict_cached(self, receipt_id: str) -> None:
+        """Drop a receipt from the cache after it was written or deleted."""
+        with self._cache_lock:
+            self._cache.pop(receipt_id, None)
+    
+    def find_by_ids(self, receipt_ids: List[str]) -> Dict[str, Receipt]:
         """
-        Load receipt items from the receipt_items table.
+        Find several receipts by their IDs.
+        
+        On PostgreSQL this is one query for the receipts and one for their
+        items, regardless of how many IDs are requested.
         
         Args:
-            receipt_id: The receipt ID
+            receipt_ids: The receipt IDs
             
         Returns:
-            List of item dictionaries
+            Dictionary mapping each found receipt ID to its Receipt
         """
+        if not receipt_ids:
+            return {}
+        
+        if not isinstance(self.store_service, PostgresStoreDataService):
+            receipts = (self.find_by_id(receipt_id) for receipt_id in receipt_ids)
+            return {receipt.receipt_id: receipt for receipt in receipts if receipt is not None}
+        
         try:
-            self.store_service.cursor.execute(
-                "SELECT name, price, quantity, category FROM receipt_items WHERE receipt_id = %s",
-                (receipt_id,)
-            )
+            logger.info(f"Finding {len(receipt_ids)} receipts by ID")
             
-            columns = [desc[0] for desc in self.store_service.cursor.description]
-            rows = self.store_service.cursor.fetchall()
+            rows = self._select_with_items("receipt_id = ANY(%s)", (list(receipt_ids),))
+            return {row['receipt_id']: self._to_entity(row) for row in rows}
+        except Exception as e:
+            logger.error(f"Error finding receipts by ID: {str(e)}")
+            raise
+    
+    def _get_with_items(self, receipt_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a receipt row and its items from PostgreSQL in one query.
+        
+        The items are aggregated into a JSON array column, which psycopg2
+        decodes into a list of dictionaries.
+        
+        Args:
+            receipt_id: The receipt ID
             
-            items = []
-            for row in rows:
-                item_dict = dict(zip(columns, row))
-                items.append(item_dict)
+        Returns:
+            Receipt dictionary with an 'items' list, or None if not found
+        """
+        with self.store_service.get_cursor(dict_rows=True) as cursor:
+            cursor.execute(
+                f"""
+                SELECT r.*, COALESCE(
+                    json_agg(json_build_object(
+                        'name', i.name, 'price', i.price, 'quantity', i.quantity, 'category', i.category
+                    )) FILTER (WHERE i.receipt_id IS NOT NULL),
+                    '[]'
+                ) AS items
+                FROM {self.table_name} r
+                LEFT JOIN receipt_items i ON i.receipt_id = r.receipt_id
+                WHERE r.receipt_id = %s
+                GROUP BY r.receipt_id
+                """,
+                (receipt_id,)
+            )
             
-            return items
-        except Exception as e:
-            logger.error(f"Error loading receipt items: {e}")
-            return []
+            return cursor.fetchone()
     
-    def find_by_user_id(self, user_id: str, limit: Optional[int] = None) -> List[Receipt]:
+    def find_by_user_id(self, user_id: str, limit: Optional[int] = None,
+                        projection: Optional[Iterable[str]] = None) -> List[Receipt]:
         """
         Find all receipts for a specific user.
         
         Args:
             user_id: The user ID
             limit: Optional maximum number of results
+            projection: Optional fields to load; see find_all
             
         Returns:
             List of receipts for the user
         """
-        return self.find_all(filters={'user_id': user_id}, limit=limit)
+        return self.find_all(filters={'user_id': user_id}, limit=limit, projection=projection)
     
-    def find_all(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[Receipt]:
+    def _select_with_items(self, where: str, params: tuple, suffix: str = '',
+                           columns: str = '*', with_items: bool = True) -> List[Dict[str, Any]]:
+        """
+        Select receipt rows from PostgreSQL and attach their items.
+        
+        Two queries at most: one for the receipts and one for the items of
+        all of them, however many receipts match.
+        
+        Args:
+            where: SQL condition for the receipts query
+            params: Parameters for the condition and suffix
+            suffix: Optional ORDER BY/LIMIT clauses
+            columns: Column list to select from the receipts table
+            with_items: Whether to load the items as well
+            
+        Returns:
+            List of receipt dictionaries, each with an 'items' list if requested
+        """
+        with self.store_service.get_cursor(dict_rows=True) as cursor:
+            cursor.execute(f"SELECT {columns} FROM {self.table_name} WHERE {where}{suffix}", params)
+            rows = cursor.fetchall()
+            if not with_items:
+                return rows
+            
+            # Load the items of every receipt in one query instead of one per receipt
+            items_by_receipt = self._load_items_for_receipts(cursor, [row['receipt_id'] for row in rows])
+        for row in rows:
+            row['items'] = items_by_receipt.get(row['receipt_id'], [])
+        return rows
+    
+    def _load_items_for_receipts(self, cursor, receipt_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Load the items of several receipts with a single query.
+        
+        Args:
+            cursor: Dictionary-row cursor to run the query on
+            receipt_ids: The receipt IDs
+            
+        Returns:
+            Dictionary mapping each receipt ID to its item dictionaries
+        """
+        if not receipt_ids:
+            return {}
+        
+        cursor.execute(
+            "SELECT receipt_id, name, price, quantity, category FROM receipt_items WHERE receipt_id = ANY(%s)",
+            (list(receipt_ids),)
+        )
+        
+        items_by_receipt: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for row in cursor.fetchall():
+            items_by_receipt[row.pop('receipt_id')].append(row)
+        return items_by_receipt
+    
+    def totals_by_user(self, user_id: str) -> Dict[str, Decimal]:
+        """
+        Compute the total of every receipt of a user without loading the receipts.
+        
+        On PostgreSQL the sum is done by the database, so no item rows reach
+        Python; other backends fall back to loading the entities.
+        
+        Args:
+            user_id: The user ID
+            
+        Returns:
+            Dictionary mapping each receipt ID to its total; receipts without
+            items are omitted
+        """
+        if not isinstance(self.store_service, PostgresStoreDataService):
+            return {receipt.receipt_id: receipt.calculate_total()
+                    for receipt in self.find_by_user_id(user_id) if receipt.items}
+        
+        try:
+            logger.info(f"Computing receipt totals for user {user_id}")
+            
+            with self.store_service.get_cursor() as cursor:
+                cursor.execute(
+                    "SELECT receipt_id, SUM(price * quantity) FROM receipt_items "
+                    f"WHERE receipt_id IN (SELECT receipt_id FROM {self.table_name} WHERE user_id = %s) "
+                    "GROUP BY receipt_id",
+                    (user_id,)
+                )
+                return {receipt_id: Decimal(str(total)) for receipt_id, total in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Error computing receipt totals for user {user_id}: {str(e)}")
+            raise
+    
+    def find_all(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                 projection: Optional[Iterable[str]] = None) -> List[Receipt]:
         """
         Find all receipts matching the given filters.
         
+        With a projection only the named fields are fetched (receipt_id is
+        always included, and items are only loaded when named). Entities
+        are built without validation, so fields outside the projection keep
+        their defaults and required ones are unset.
+        
         Args:
             filters: Optional dictionary of field-value pairs to filter by
             limit: Optional maximum number of results to return
+            projection: Optional receipt fields to load
             
         Returns:
             List of receipts matching the filters
         """
+        if not isinstance(self.store_service, PostgresStoreDataService):
+            # The store interface has no scan/query operation for DynamoDB yet
+            logger.warning("find_all is only supported for PostgreSQL")
+            return []
+        
         try:
             logger.info(f"Finding receipts with filters: {filters}, limit: {limit}")
             
-            # Note: This is a simplified implementation
-            # In a production environment, you'd implement proper querying
-            # with pagination support for both DynamoDB and PostgreSQL
+            filters = filters or {}
+            # Only real receipt columns may appear in the WHERE clause
+            unknown = [key for key in filters if key not in self._RECEIPT_COLUMNS]
+            if unknown:
+                raise ValueError(f"Cannot filter receipts by: {', '.join(unknown)}")
             
-            # For now, return empty list as full scan would need more implementation
-            logger.warning("find_all requires custom implementation per store type")
-            return []
+            where = ' AND '.join(f"{key} = %s" for key in filters) or 'TRUE'
+            params: tuple = tuple(
+                value.value if hasattr(value, 'value') else value for value in filters.values()
+            )
+            suffix = " ORDER BY purchase_date DESC"
+            if limit is not None:
+                suffix += " LIMIT %s"
+                params += (limit,)
+            
+            if projection is None:
+                return [self._to_entity(row) for row in self._select_with_items(where, params, suffix)]
+            
+            fields = set(projection)
+            unknown = fields - set(self._RECEIPT_COLUMNS) - {'items'}
+            if unknown:
+                raise ValueError(f"Cannot project receipts on: {', '.join(sorted(unknown))}")
+            columns = ['receipt_id'] + [column for column in self._RECEIPT_COLUMNS[1:] if column in fields]
+            rows = self._select_with_items(
+                where, params, suffix, columns=', '.join(columns), with_items='items' in fields
+            )
+            return [self._to_entity(row) for row in rows]
         except Exception as e:
             logger.error(f"Error finding receipts: {str(e)}")
             raise
@@ -221,6 +706,7 @@ class ReceiptRepository(BaseRepository[Receipt]):
             
             # For PostgreSQL, items will be deleted automatically due to CASCADE
             self.store_service.delete(self.table_name, {'receipt_id': receipt_id})
+            self._evict_cached(receipt_id)
             
             logger.info(f"Successfully deleted receipt {receipt_id}")
             return True
@@ -238,8 +724,8 @@ class ReceiptRepository(BaseRepository[Receipt]):
         Returns:
             True if exists, False otherwise
         """
-        receipt = self.find_by_id(receipt_id)
-        return receipt is not None
+        # Key-only lookup; no items query and no Receipt construction
+        return self.store_service.exists(self.table_name, {'receipt_id': receipt_id})
     
     def update(self, receipt_id: str, **kwargs) -> Optional[Receipt]:
         """
@@ -252,67 +738,118 @@ class ReceiptRepository(BaseRepository[Receipt]):
         Returns:
             The updated Receipt if found, None otherwise
         """
-        receipt = self.find_by_id(receipt_id)
+        if isinstance(self.store_service, PostgresStoreDataService):
+            return self._update_postgres(receipt_id, **kwargs)
+        
+        # Read from the store, not the find_by_id cache: other processes
+        # (the bot, the API) may have changed the receipt since it was cached
+        data = self.store_service.get(self.table_name, {'receipt_id': receipt_id})
         
-        if not receipt:
+        if not data:
             logger.warning(f"Cannot update: Receipt {receipt_id} not found")
             return None
+        receipt = self._to_entity(data)
         
         # Update fields in the entity
         for key, value in kwargs.items():
-            if hasattr(receipt, key):
+            if key in Receipt.model_fields:
                 setattr(receipt, key, value)
         
         # Update timestamp
         receipt.updated_at = datetime.now()
-        kwargs['updated_at'] = receipt.updated_at
         
         logger.info(f"Updating receipt {receipt_id} with fields: {list(kwargs.keys())}")
         
-        # Check if using PostgreSQL (which has separate tables for items)
-        if isinstance(self.store_service, PostgresStoreDataService):
-            # Update receipt without items
-            receipt_data_to_update = {}
-            for key, value in kwargs.items():
-                if key != 'items':  # items are handled separately
-                    if key == 'total_amount':
-                        receipt_data_to_update[key] = str(value) if value is not None else '0.0'
-                    elif key in ['purchase_date', 'created_at', 'updated_at']:
-                        if hasattr(value, 'isoformat'):
-                            receipt_data_to_update[key] = value.isoformat()
-                        else:
-                            receipt_data_to_update[key] = value
-                    elif key == 'status':
-                        # Convert enum to string
-                        receipt_data_to_update[key] = value.value if hasattr(value, 'value') else str(value)
-                    else:
-                        receipt_data_to_update[key] = value
-            
-            # Update the receipt table
-            if receipt_data_to_update:
-                self.store_service.update(
-                    table_name=self.table_name,
-                    key={'receipt_id': receipt_id},
-                    data=receipt_data_to_update
-                )
+        # DynamoDB: write only the changed attributes (items embedded), so
+        # fields changed concurrently by another writer are left alone
+        receipt_data = self._to_row(receipt)
+        changed = {key for key in kwargs if key in Receipt.model_fields} | {'updated_at'}
+        changed.discard('receipt_id')
+        receipt_data_to_update = {k: v for k, v in receipt_data.items() if k in changed}
+        
+        self.store_service.update(
+            table_name=self.table_name,
+            key={'receipt_id': receipt_id},
+            data=receipt_data_to_update
+        )
+        self._evict_cached(receipt_id)
+        
+        logger.info(f"Successfully updated receipt {receipt_id}")
+        return receipt
+    
+    def _update_postgres(self, receipt_id: str, **kwargs) -> Optional[Receipt]:
+        """
+        Update a receipt in PostgreSQL without reading it first.
+        
+        Only the given columns are written, and the updated row comes back
+        through RETURNING. Items, when given, are replaced in the same
+        transaction; otherwise they are loaded on the same cursor.
+        
+        Args:
+            receipt_id: The receipt ID
+            **kwargs: Fields to update
             
-            # Update items if provided
-            if 'items' in kwargs and kwargs['items']:
-                self._save_receipt_items(receipt_id, kwargs['items'])
-        else:
-            # DynamoDB: update with items embedded
-            receipt_data = self._to_dict(receipt)
-            # Remove receipt_id from data (it's the key)
-            receipt_data_to_update = {k: v for k, v in receipt_data.items() if k != 'receipt_id'}
-            
-            self.store_service.update(
-                table_name=self.table_name,
-                key={'receipt_id': receipt_id},
-                data=receipt_data_to_update
+        Returns:
+            The updated Receipt if found, None otherwise
+        """
+        kwargs['updated_at'] = datetime.now()
+        logger.info(f"Updating receipt {receipt_id} with fields: {list(kwargs.keys())}")
+        
+        data = {
+            key: self._column_value(key, value)
+            for key, value in kwargs.items()
+            if key in self._RECEIPT_COLUMNS and key != 'receipt_id'
+        }
+        items = None
+        if 'items' in kwargs:
+            items = [item if isinstance(item, ReceiptItem) else ReceiptItem(**item)
+                     for item in kwargs['items'] or []]
+        
+        set_clause = ', '.join(f"{key} = %s" for key in data)
+        with self.store_service.get_cursor(dict_rows=True) as cursor:
+            cursor.execute(
+                f"UPDATE {self.table_name} SET {set_clause} WHERE receipt_id = %s RETURNING *",
+                tuple(data.values()) + (receipt_id,)
             )
+            row = cursor.fetchone()
+            if row is None:
+                logger.warning(f"Cannot update: Receipt {receipt_id} not found")
+                return None
+            
+            if items is not None:
+                self._write_receipt_items(cursor, receipt_id, items)
+                row['items'] = items
+            else:
+                row['items'] = self._load_items_for_receipts(cursor, [receipt_id]).get(receipt_id, [])
+        self._evict_cached(receipt_id)
         
         logger.info(f"Successfully updated receipt {receipt_id}")
-        return receipt
+        return self._to_entity(row)
+    
+    @staticmethod
+    def _column_value(key: str, value: Any) -> Any:
+        """
+        Convert a receipt field value to its PostgreSQL column value.
+        
+        Args:
+            key: The field name
+            value: The field value
+            
+        Returns:
+            The value to bind in SQL
+        """
+        if key == 'total_amount':
+            return str(value) if value is not None else '0.0'
+        if key in Receipt.TIMESTAMP_FIELDS:
+            return value.isoformat() if hasattr(value, 'isoformat') else value
+        if key == 'status':
+            # Convert enum to string
+            return value.value if hasattr(value, 'value') else str(value)
+        return value
+    
+    async def aupdate(self, receipt_id: str, **kwargs) -> Optional[Receipt]:
+        """Async variant of update()."""
+        return await self._run_async(self.update, receipt_id, **kwargs)
     
     def _to_entity(self, data: Dict[str, Any]) -> Receipt:
         """
@@ -324,11 +861,25 @@ class ReceiptRepository(BaseRepository[Receipt]):
         Returns:
             Receipt entity
         """
+        # Rows come from our own store and were validated when written, so
+        # skip validation here; save() still validates user input
+        return Receipt.model_construct(**self._convert_row(data))
+    
+    def _convert_row(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert stored values in a database row to Receipt field values.
+        
+        Args:
+            data: Dictionary from database
+            
+        Returns:
+            The same dictionary with converted values
+        """
         # Convert ISO format strings back to datetime objects
-        for field in ['purchase_date', 'created_at', 'updated_at']:
+        for field in Receipt.TIMESTAMP_FIELDS:
             if field in data and data[field] and isinstance(data[field], str):
                 try:
-                    data[field] = datetime.fromisoformat(data[field])
+                    data[field] = _parse_iso(data[field])
                 except (ValueError, AttributeError):
                     pass
         
@@ -338,17 +889,42 @@ class ReceiptRepository(BaseRepository[Receipt]):
         
         # Convert status string to ReceiptStatus enum if needed
         if 'status' in data and isinstance(data['status'], str):
-            from entities.receipt import ReceiptStatus
             data['status'] = ReceiptStatus(data['status'])
         
-        # Convert items dict to ReceiptItem objects if needed
+        # Items stored as a JSON string (DynamoDB) are decoded in one call
+        if isinstance(data.get('items'), str):
+            data['items'] = json.loads(data['items'])
+        
+        # Convert items dict to ReceiptItem objects if needed; stored rows
+        # are trusted, so items are constructed without validation
         if 'items' in data and data['items']:
             if isinstance(data['items'], list) and data['items']:
                 if not isinstance(data['items'][0], ReceiptItem):
-                    data['items'] = [ReceiptItem(**item) if isinstance(item, dict) else item 
-                                    for item in data['items']]
+                    data['items'] = [
+                        self._item_from_row(item) if isinstance(item, dict) else item
+                        for item in data['items']
+                    ]
+        
+        return data
+    
+    @staticmethod
+    def _item_from_row(item: Dict[str, Any]) -> ReceiptItem:
+        """
+        Build a ReceiptItem from a stored item without validation.
         
-        return Receipt(**data)
+        Numbers are coerced to the field types first: DynamoDB returns
+        them as Decimal, and older items hold the quantity that way too.
+        
+        Args:
+            item: Stored item fields
+            
+        Returns:
+            The receipt item
+        """
+        fields = {**item, 'price': float(item['price'])}
+        if item.get('quantity') is not None:
+            fields['quantity'] = int(item['quantity'])
+        return ReceiptItem.model_construct(**fields)
     
     def _to_dict(self, entity: Receipt, include_items: bool = True) -> Dict[str, Any]:
         """
@@ -361,34 +937,53 @@ class ReceiptRepository(BaseRepository[Receipt]):
         Returns:
             Dictionary suitable for database storage
         """
-        # Get all model fields, excluding any that shouldn't be stored
-        data = entity.model_dump(exclude={'table_name'} if hasattr(entity, 'table_name') else None)
+        if include_items:
+            return self._to_dict_dynamo(entity)
+        return self._to_dict_postgres(entity)
+    
+    def _to_dict_dynamo(self, entity: Receipt) -> Dict[str, Any]:
+        """
+        Convert a Receipt to a DynamoDB item, with its items embedded.
         
-        # Convert datetime objects to ISO format strings
-        for field in ['purchase_date', 'created_at', 'updated_at']:
-            if field in data and data[field]:
-                if hasattr(data[field], 'isoformat'):
-                    data[field] = data[field].isoformat()
+        Args:
+            entity: The Receipt entity
+            
+        Returns:
+            Dictionary suitable for DynamoDB storage
+        """
+        # Serialize via the entity's memoized JSON-mode dump; pydantic
+        # already emits datetimes as ISO strings in this mode and the dump
+        # holds exactly the model fields, so no further filtering is needed
+        data = entity.to_dict()
         
         # Convert total_amount to string for DynamoDB compatibility
-        if 'total_amount' in data and data['total_amount'] is not None:
-            data['total_amount'] = str(data['total_amount'])
-        
-        # Define allowed fields based on whether items should be included
-        if include_items:
-            # DynamoDB: include items as embedded documents
-            allowed_fields = {
-                'receipt_id', 'user_id', 'purchase_date', 'total_amount',
-                'items', 'image_url', 'status', 'created_at', 'updated_at'
-            }
-        else:
-            # PostgreSQL: exclude items (they're in a separate table)
-            allowed_fields = {
-                'receipt_id', 'user_id', 'purchase_date', 'total_amount',
-                'image_url', 'status', 'created_at', 'updated_at'
-            }
+        data['total_amount'] = str(data['total_amount'])
+        # Store items as one JSON string attribute: boto3 would otherwise
+        # type-serialize every nested value and rejects float prices
+        data['items'] = entity.items_to_json()
+        return data
+    
+    def _to_dict_postgres(self, entity: Receipt) -> Dict[str, Any]:
+        """
+        Convert a Receipt to a row of the PostgreSQL receipts table.
         
-        # Filter to only allowed fields
-        data = {key: value for key, value in data.items() if key in allowed_fields}
+        Items are excluded; they live in the receipt_items table. The
+        columns are read straight off the entity, so the cost does not grow
+        with the number of items.
         
-        return data
+        Args:
+            entity: The Receipt entity
+            
+        Returns:
+            Dictionary keyed by the receipts table columns
+        """
+        return {
+            'receipt_id': entity.receipt_id,
+            'user_id': entity.user_id,
+            'purchase_date': entity.purchase_date.isoformat(),
+            'total_amount': str(entity.total_amount),
+            'image_url': entity.image_url,
+            'status': entity.status.value,
+            'created_at': entity.created_at.isoformat(),
+            'updated_at': entity.updated_at.isoformat(),
+        }
@@ -2,8 +2,9 @@
 Repository factory for creating repository instances.
 Provides a centralized way to create repositories with the correct storage backend.
 """
+import threading
 from enum import Enum
-from typing import Dict, Type
+from typing import Dict, Tuple, Type
 
 from repositories.base_repository import IRepository
 from repositories.receipt_repository import ReceiptRepository
@@ -21,7 +22,9 @@ class RepositoryFactory:
     Uses singleton pattern to cache repository instances.
     """
     
-    _instances: Dict[str, IRepository] = {}
+    _instances: Dict[Tuple[RepositoryType, ServiceType], IRepository] = {}
+    # Guards creation so concurrent first calls build a single repository
+    _lock = threading.Lock()
     
     @staticmethod
     def create_receipt_repository(service_type: ServiceType = ServiceType.DYNAMODB) -> ReceiptRepository:
@@ -34,9 +37,19 @@ class RepositoryFactory:
         Returns:
             ReceiptRepository instance
         """
-        cache_key = f"receipt_{service_type.value}"
+        cache_key = (RepositoryType.RECEIPT, service_type)
         
-        if cache_key not in RepositoryFactory._instances:
+        # Fast path: a single dict lookup once the repository exists
+        repository = RepositoryFactory._instances.get(cache_key)
+        if repository is not None:
+            return repository
+        
+        with RepositoryFactory._lock:
+            # Another thread may have created it while we waited
+            repository = RepositoryFactory._instances.get(cache_key)
+            if repository is not None:
+                return repository
+            
             # Get the appropriate storage service
             store_service = StoreDataServiceFactory.create(service_type)
             
@@ -46,9 +59,10 @@ class RepositoryFactory:
             # Cache it
             RepositoryFactory._instances[cache_key] = repository
         
-        return RepositoryFactory._instances[cache_key]
+        return repository
     
     @staticmethod
     def clear_cache():
         """Clear the repository cache. Useful for testing."""
-        RepositoryFactory._instances.clear()
+        with RepositoryFactory._lock:
+            RepositoryFactory._instances.clear()
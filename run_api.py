@@ -2,7 +2,6 @@
 import os
 import sys
 import logging
-import uvicorn
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -34,8 +33,10 @@ def main():
             logger.error(f"{var} environment variable is not set")
             sys.exit(1)
     
-    # Run the FastAPI application
+    # Run the FastAPI application; uvicorn is only imported once the
+    # environment is known to be valid
     try:
+        import uvicorn
         logger.info("Starting the FastAPI application...")
         uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
     except Exception as e:
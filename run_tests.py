@@ -2,6 +2,15 @@
 import pytest
 import sys
 
+# Spread the test files over all cores when pytest-xdist is installed.
+# loadfile keeps each file on one worker, so tests that rely on the
+# factory's process-wide instances still see them
+try:
+    import xdist  # noqa: F401
+    PARALLEL_ARGS = ["-n", "auto", "--dist", "loadfile"]
+except ImportError:
+    PARALLEL_ARGS = []
+
 if __name__ == "__main__":
     # Run pytest with the provided arguments or default to running all tests
-    sys.exit(pytest.main(sys.argv[1:] or ["tests"])) 
\ No newline at end of file
+    sys.exit(pytest.main(PARALLEL_ARGS + (sys.argv[1:] or ["tests"])))
@@ -1,21 +1,51 @@
 # I want to create a service that will authenticate a user based on a JWT token
 
 from fastapi import HTTPException
-from jose import jwt, JWTError
+from jose import jwk, jwt, JWTError
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
-import os
+from typing import Optional, Tuple
+import hashlib
+import time
 
 
 class AuthenticationService:
+    # Verified tokens are remembered for at most this many seconds
+    CACHE_TTL_SECONDS = 60
+    CACHE_MAX_SIZE = 10000
+
     def __init__(self, secret_key: str, algorithm: str = "HS256"):
-        self.secret_key = os.getenv("JWT_SECRET_KEY")
+        self.secret_key = secret_key
         self.algorithm = algorithm
+        # Verification key, constructed once on first use instead of per decode
+        self._key = None
+        # sha256(token) -> (cache expiry, payload); raw tokens are never kept
+        self._verified: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
 
     def authenticate(self, token: str) -> Optional[dict]:
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        cached = self._verified.get(key)
+        if cached is not None:
+            expires_at, payload = cached
+            if expires_at > now:
+                return payload
+            self._verified.pop(key, None)
+
         try:
+            if self._key is None:
+                self._key = jwk.construct(self.secret_key, self.algorithm)
+            
             # Verify the token
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = jwt.decode(token, self._key, algorithms=[self.algorithm])
+            
+            # Cache the payload until the TTL or the token's own exp, whichever comes first
+            expires_at = now + self.CACHE_TTL_SECONDS
+            if isinstance(payload.get("exp"), (int, float)):
+                expires_at = min(expires_at, payload["exp"])
+            self._verified[key] = (expires_at, payload)
+            while len(self._verified) > self.CACHE_MAX_SIZE:
+                self._verified.popitem(last=False)
             
             # Return the payload if valid
             return payload
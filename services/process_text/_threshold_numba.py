@@ -0,0 +1,38 @@
+"""
+Numba implementation of adaptive thresholding used by ocr_processor.
+
+Enabled by setting USE_NUMBA_OCR=1; numba is an optional dependency. The
+threshold is the mean of a square window (read from an integral image)
+minus C, matching cv2.ADAPTIVE_THRESH_MEAN_C with cv2.THRESH_BINARY_INV.
+Windows are clipped at the image border instead of using replicated
+pixels. Rows are processed in parallel across CPU cores.
+"""
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, cache=True)
+def adaptive_thresh(gray, block, C):
+    h, w = gray.shape
+    r = block // 2
+
+    # Integral image: integral[i, j] is the sum of gray[:i, :j]
+    integral = np.zeros((h + 1, w + 1), dtype=np.int64)
+    for i in range(h):
+        row_sum = 0
+        for j in range(w):
+            row_sum += gray[i, j]
+            integral[i + 1, j + 1] = integral[i, j + 1] + row_sum
+
+    out = np.empty((h, w), dtype=np.uint8)
+    for i in prange(h):
+        y0 = max(i - r, 0)
+        y1 = min(i + r + 1, h)
+        for j in range(w):
+            x0 = max(j - r, 0)
+            x1 = min(j + r + 1, w)
+            total = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+            mean = total / ((y1 - y0) * (x1 - x0))
+            # Inverted binary: dark (ink) pixels become white
+            out[i, j] = 255 if gray[i, j] <= mean - C else 0
+    return out
@@ -0,0 +1,135 @@
+import asyncio
+import io
+import json
+import logging
+from typing import Dict
+
+from services.process_text.extract_data import GptExtract
+
+logger = logging.getLogger(__name__)
+
+
+class GptBatchExtract(GptExtract):
+    """
+    Bulk receipt extraction through the OpenAI Batch API.
+
+    Meant for non-interactive work (bulk imports, reprocessing): batches
+    cost half as much as real-time requests and use a separate rate-limit
+    pool, but complete within a 24 hour window instead of seconds.
+    Interactive paths should keep using extract_data_from_image.
+    """
+    ENDPOINT = "/v1/chat/completions"
+    COMPLETION_WINDOW = "24h"
+    # Polling starts at the first interval and doubles up to the maximum
+    POLL_INTERVAL_SECONDS = 30
+    MAX_POLL_INTERVAL_SECONDS = 600
+    FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+    def _request_line(self, custom_id: str, image_url: str) -> str:
+        """
+        Build one JSONL request line of a batch input file.
+
+        Args:
+            custom_id (str): ID used to match the result, e.g. the receipt ID.
+            image_url (str): URL of the image file.
+
+        Returns:
+            str: The JSON-encoded request.
+        """
+        return json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": self.ENDPOINT,
+            "body": {
+                "model": self.MODEL,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": self.PROMPT},
+                            {"type": "image_url", "image_url": {"url": image_url}},
+                        ],
+                    }
+                ],
+                "response_format": {"type": "json_object"},
+                "max_tokens": 1000,
+            },
+        })
+
+    async def submit_batch(self, image_urls: Dict[str, str]) -> str:
+        """
+        Upload the extraction requests as one file and start a batch.
+
+        Args:
+            image_urls (Dict[str, str]): Image URL per custom ID (e.g. receipt ID).
+
+        Returns:
+            str: The batch ID, to pass to wait_for_batch.
+        """
+        lines = "\n".join(self._request_line(custom_id, url) for custom_id, url in image_urls.items())
+        input_file = await self.client.files.create(
+            file=("receipts.jsonl", io.BytesIO(lines.encode("utf-8"))),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.ENDPOINT,
+            completion_window=self.COMPLETION_WINDOW,
+        )
+        logger.info(f"Submitted extraction batch {batch.id} with {len(image_urls)} receipts")
+        return batch.id
+
+    async def wait_for_batch(self, batch_id: str) -> Dict[str, dict]:
+        """
+        Poll a batch until it finishes and return the extracted data.
+
+        Args:
+            batch_id (str): The ID returned by submit_batch.
+
+        Returns:
+            Dict[str, dict]: Extracted data per custom ID. Requests that
+            failed inside the batch are left out.
+
+        Raises:
+            RuntimeError: If the batch failed, expired or was cancelled.
+        """
+        interval = self.POLL_INTERVAL_SECONDS
+        batch = await self.client.batches.retrieve(batch_id)
+        while batch.status not in self.FINAL_STATUSES:
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.MAX_POLL_INTERVAL_SECONDS)
+            batch = await self.client.batches.retrieve(batch_id)
+
+        if batch.status != "completed":
+            raise RuntimeError(f"Extraction batch {batch_id} ended with status {batch.status}")
+
+        results = {}
+        if batch.output_file_id:
+            content = await self.client.files.content(batch.output_file_id)
+            for line in content.text.splitlines():
+                custom_id = None
+                try:
+                    result = json.loads(line)
+                    custom_id = result["custom_id"]
+                    response = result.get("response") or {}
+                    if response.get("status_code") != 200:
+                        logger.warning(f"Extraction failed in batch {batch_id} for {custom_id}")
+                        continue
+                    message = response["body"]["choices"][0]["message"]["content"]
+                    results[custom_id] = json.loads(message)
+                except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+                    # One malformed line must not discard the rest of the batch
+                    logger.warning(f"Unreadable result in batch {batch_id} for {custom_id}: {e}")
+        
+        # Requests that failed at the request level are only in the error file
+        if batch.error_file_id:
+            errors = await self.client.files.content(batch.error_file_id)
+            for line in errors.text.splitlines():
+                try:
+                    custom_id = json.loads(line).get("custom_id")
+                except json.JSONDecodeError:
+                    custom_id = None
+                logger.warning(f"Extraction request failed in batch {batch_id} for {custom_id}")
+        
+        logger.info(f"Extraction batch {batch_id} returned {len(results)} results")
+        return results
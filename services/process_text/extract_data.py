@@ -1,20 +1,27 @@
 from abc import ABC, abstractmethod
-from openai import OpenAI
+from typing import List, Optional, TYPE_CHECKING
+import asyncio
+import hashlib
+import json
+import logging
 import os
-from dotenv import load_dotenv
+import time
 
+from services.store_data.store_data import StoreDataInterface
 from services.upload.upload import UploadServiceFactory
 
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 class ProcessData(ABC):
     """
     Abstract base class for processing data.
     """
 
     @abstractmethod
-    def extract_data_from_image(self, image_path: str) -> dict:
+    async def extract_data_from_image(self, image_path: str) -> dict:
         """
         Extract data from an image.
 
@@ -31,27 +38,125 @@ class GptExtract(ProcessData):
     """
     Implementation of ProcessData using GPT for data extraction.
     """
-    def __init__(self):
+    MODEL = "gpt-4o-mini"
+    PROMPT = (
+        "Extract all readable text from this receipt and structure it as a JSON object with the "
+        "following format: {\"items\": [{\"name\": \"item name\", \"price\": 0.00, \"quantity\": 1, "
+        "\"category\": \"category name\"}], \"total\": 0.00}. Categorize each item (e.g., food, "
+        "beverage, household, other). Return ONLY valid JSON, no markdown formatting."
+    )
+    # Requests in flight at once in extract_many, to stay under the API rate limit
+    MAX_CONCURRENCY = 8
+    # Retries with exponential backoff on rate limits, timeouts and 5xx errors
+    MAX_RETRIES = 3
+    # Table holding cached extractions, keyed by cache_key; expires_at can
+    # be configured as the table's DynamoDB TTL attribute. See
+    # migrations/add_receipt_extractions_table.sql
+    CACHE_TABLE = "receipt_extractions"
+    CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+    def __init__(self, cache_store: Optional[StoreDataInterface] = None):
         """
         Initialize the GPT client with API key from environment variables.
+
+        Args:
+            cache_store (Optional[StoreDataInterface]): Store for caching
+                extraction results across processes. No caching when omitted.
         """
         if not os.getenv("OPENAI_API_KEY"):
             raise ValueError("Missing required OpenAI API key in environment variables")
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.upload_service = UploadServiceFactory() 
-        # Initialize the upload service
-        
+        # The async client is created on first use, inside the event loop that uses it
+        self._client = None
+        self.cache_store = cache_store
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            # Imported on first use; loading openai is a noticeable share of startup
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=self.MAX_RETRIES)
+        return self._client
 
-    def extract_data_from_image(self, image_url: str) -> dict:
+    @property
+    def upload_service(self):
+        # The process-wide upload service, so its S3 client and connection pool are shared
+        return UploadServiceFactory.create()
+
+    async def extract_data_from_image(self, image_url: str) -> dict:
         """
         Extract data from an image using GPT.
 
+        The request is awaited, so other receipts can be processed while
+        this one is in flight. With a cache store, an image that was
+        already extracted is answered from the store without an API call;
+        uploads are named by content hash, so a re-sent photo has the same URL.
+        The cache is best effort: if the store fails, the image is extracted
+        (or the result returned) as if there were no cache.
+
         Args:
-            image_path (str): Path to the image file.
+            image_url (str): URL of the image file.
 
         Returns:
             dict: Extracted data.
         """
+        if self.cache_store is None:
+            return await self._extract(image_url)
+
+        cache_key = hashlib.blake2b(image_url.encode("utf-8"), digest_size=16).hexdigest()
+        try:
+            cached = await asyncio.to_thread(self.cache_store.get, self.CACHE_TABLE, {"cache_key": cache_key})
+            # The TTL sweep can lag, so expired entries are checked here too
+            if cached and int(cached["expires_at"]) > time.time():
+                return json.loads(cached["response"])
+        except Exception as e:
+            logger.warning(f"Extraction cache read failed for {cache_key}: {e}")
+
+        data = await self._extract(image_url)
+        try:
+            # Upsert: an expired entry, or a concurrent miss on the same
+            # image, already holds this key
+            await asyncio.to_thread(self.cache_store.upsert, self.CACHE_TABLE, {
+                "cache_key": cache_key,
+                "response": json.dumps(data, separators=(",", ":")),
+                "expires_at": int(time.time()) + self.CACHE_TTL_SECONDS,
+            }, ("cache_key",))
+        except Exception as e:
+            logger.warning(f"Extraction cache write failed for {cache_key}: {e}")
+        return data
+
+    async def _extract(self, image_url: str) -> dict:
+        response = await self.client.chat.completions.create(
+            model=self.MODEL,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": self.PROMPT},
+                        {"type": "image_url", "image_url": {"url": image_url}},
+                    ],
+                }
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=1000,
+        )
+        return json.loads(response.choices[0].message.content)
+
+    async def extract_many(self, image_urls: List[str]) -> List[dict]:
+        """
+        Extract data from several images concurrently.
+
+        At most MAX_CONCURRENCY requests are in flight at once.
+
+        Args:
+            image_urls (List[str]): URLs of the image files.
+
+        Returns:
+            List[dict]: Extracted data, in the same order as the URLs.
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async def extract(image_url: str) -> dict:
+            async with semaphore:
+                return await self.extract_data_from_image(image_url)
 
-        # Download images from S3
-        return {"data": "extracted data"}
\ No newline at end of file
+        return await asyncio.gather(*(extract(image_url) for image_url in image_urls))
\ No newline at end of file
@@ -1,14 +1,25 @@
-import boto3
 from abc import ABC, abstractmethod
 import logging
 import os
+import time
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
 from enum import Enum
-from dotenv import load_dotenv
-
-load_dotenv()
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+
+
+def _configure_logger():
+    """
+    Apply LOG_LEVEL to this module's logger.
+
+    Per-write logs are DEBUG; set LOG_LEVEL=DEBUG to see them. Read when a
+    service is created rather than at import, so a LOG_LEVEL loaded from
+    .env by the entry point is honoured.
+    """
+    logger.setLevel(os.getenv('LOG_LEVEL', 'WARNING').upper())
+
 class StoreDataInterface(ABC):
     @abstractmethod
     def save(self, table_name: str, data: dict):
@@ -25,6 +36,21 @@ class StoreDataInterface(ABC):
     @abstractmethod
     def delete(self, table_name: str, data: dict):
         pass
+
+    def batch_save(self, table_name: str, items: list):
+        # Default: one write per item. Backends override with a bulk write.
+        for item in items:
+            self.save(table_name, item)
+        return items
+
+    def exists(self, table_name: str, key: dict) -> bool:
+        # Default: a full read. Backends override with a key-only lookup.
+        return self.get(table_name, key) is not None
+
+    def upsert(self, table_name: str, data: dict, key_columns: tuple):
+        # Default: save() already replaces a row with the same key (e.g.
+        # DynamoDB put_item). Backends whose save is a plain insert override.
+        return self.save(table_name, data)
     
 class ServiceType(Enum):
     DYNAMODB = 'dynamodb'
@@ -50,6 +76,9 @@ class StoreDataServiceFactory:
 class PostgresStoreDataService(StoreDataInterface):
     _instance = None
     _initialized = False
+    # Statement names PREPAREd on each pooled connection; dropped along
+    # with the connection
+    _prepared_statements = weakref.WeakKeyDictionary()
     
     def __new__(cls):
         if cls._instance is None:
@@ -61,98 +90,202 @@ class PostgresStoreDataService(StoreDataInterface):
         if PostgresStoreDataService._initialized:
             return
             
+        _configure_logger()
         try:
-            import psycopg2
+            from psycopg2.pool import ThreadedConnectionPool
 
-            self.connection = psycopg2.connect(
+            # Connections are opened once and reused, so requests don't pay
+            # for a TCP handshake and authentication every time
+            self.pool = ThreadedConnectionPool(
+                minconn=int(os.getenv('POSTGRES_POOL_MIN', 2)),
+                maxconn=int(os.getenv('POSTGRES_POOL_MAX', 20)),
                 dbname=os.getenv('POSTGRES_DB'),
                 user=os.getenv('POSTGRES_USER'),
                 password=os.getenv('POSTGRES_PASSWORD'),
                 host=os.getenv('POSTGRES_HOST'),
-                port=os.getenv('POSTGRES_PORT')
+                port=os.getenv('POSTGRES_PORT'),
+                application_name=os.getenv('POSTGRES_APPLICATION_NAME', 'home-budget'),
+                # TCP keepalives stop idle pooled connections from being
+                # silently dropped by NATs and load balancers
+                keepalives=1,
+                keepalives_idle=30
             )
-            self.cursor = self.connection.cursor()
             PostgresStoreDataService._initialized = True
-            logger.info("PostgreSQL connection initialized (singleton)")
-        except Exception as e:
-            logger.error(f"Failed to initialize PostgreSQL connection: {str(e)}")
+            logger.info("PostgreSQL connection pool initialized (singleton)")
+        except Exception:
+            logger.exception("Failed to initialize PostgreSQL connection")
+            raise
+
+    @contextmanager
+    def get_cursor(self, dict_rows: bool = False):
+        """
+        Borrow a pooled connection and yield a cursor on it.
+
+        The transaction is committed when the block exits normally and
+        rolled back if it raises; the connection then goes back to the pool.
+
+        Args:
+            dict_rows: Return rows as dictionaries keyed by column name
+        """
+        from psycopg2.extras import RealDictCursor
+
+        connection = self.pool.getconn()
+        try:
+            with connection.cursor(cursor_factory=RealDictCursor if dict_rows else None) as cursor:
+                yield cursor
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self.pool.putconn(connection)
+
+    def prepared_statements(self, connection) -> set:
+        """
+        Names of the statements PREPAREd on a pooled connection.
+
+        Prepared statements are server state of the connection, so every
+        user of the pool shares this record. Callers add the names they
+        PREPARE to the returned set.
+
+        Args:
+            connection: A connection borrowed through get_cursor
+        """
+        return self._prepared_statements.setdefault(connection, set())
+
+    # SQL text depends only on the table and the column names, so each
+    # shape is built once and reused by every later call
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _insert_query(table_name: str, columns: tuple) -> str:
+        placeholders = ', '.join(['%s'] * len(columns))
+        return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _assignments(columns: tuple, separator: str) -> str:
+        return separator.join(f"{column} = %s" for column in columns)
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _upsert_query(table_name: str, columns: tuple, key_columns: tuple) -> str:
+        updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in columns if column not in key_columns)
+        conflict = f"ON CONFLICT ({', '.join(key_columns)}) "
+        conflict += f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        return f"{PostgresStoreDataService._insert_query(table_name, columns)} {conflict}"
+
+    def upsert(self, table_name: str, data: dict, key_columns: tuple):
+        try:
+            query = self._upsert_query(table_name, tuple(data), tuple(key_columns))
+            
+            with self.get_cursor() as cursor:
+                cursor.execute(query, tuple(data.values()))
+            
+            logger.debug("Upserted row into PostgreSQL table %s", table_name)
+            return data
+        except Exception:
+            logger.exception("Failed to upsert data into PostgreSQL")
             raise
 
     def save(self, table_name: str, data: dict):
         try:
-            columns = ', '.join(data.keys())
-            placeholders = ', '.join(['%s'] * len(data))
             values = tuple(data.values())
             
-            query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-            logger.info(f"Attempting to save data to PostgreSQL: {data}")
+            query = self._insert_query(table_name, tuple(data))
             
-            self.cursor.execute(query, values)
-            self.connection.commit()
+            with self.get_cursor() as cursor:
+                cursor.execute(query, values)
             
-            logger.info(f"Successfully saved data to PostgreSQL")
+            logger.debug("Saved row to PostgreSQL table %s", table_name)
             return data
-        except Exception as e:
-            self.connection.rollback()
-            logger.error(f"Failed to save data to PostgreSQL: {str(e)}")
+        except Exception:
+            logger.exception("Failed to save data to PostgreSQL")
             raise
     
     def update(self, table_name: str, key: dict, data: dict):
         try:
             # Build SET clause for UPDATE
-            set_clause = ', '.join([f"{k} = %s" for k in data.keys()])
+            set_clause = self._assignments(tuple(data), ', ')
             # Build WHERE clause from key
-            where_clause = ' AND '.join([f"{k} = %s" for k in key.keys()])
+            where_clause = self._assignments(tuple(key), ' AND ')
             
             values = tuple(data.values()) + tuple(key.values())
             
             query = f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
-            logger.info(f"Attempting to update data in PostgreSQL: {data}")
             
-            self.cursor.execute(query, values)
-            self.connection.commit()
+            with self.get_cursor() as cursor:
+                cursor.execute(query, values)
             
-            logger.info(f"Successfully updated data in PostgreSQL")
+            logger.debug("Updated row in PostgreSQL table %s", table_name)
             return data
-        except Exception as e:
-            self.connection.rollback()
-            logger.error(f"Failed to update data in PostgreSQL: {str(e)}")
+        except Exception:
+            logger.exception("Failed to update data in PostgreSQL")
+            raise
+    
+    def batch_save(self, table_name: str, items: list):
+        if not items:
+            return items
+        try:
+            from psycopg2.extras import execute_values
+
+            # All rows share the column layout of the first one
+            columns = list(items[0].keys())
+            values = [tuple(item[column] for column in columns) for item in items]
+            
+            query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s"
+            
+            with self.get_cursor() as cursor:
+                execute_values(cursor, query, values, page_size=500)
+            
+            logger.debug("Saved %s rows to PostgreSQL table %s", len(items), table_name)
+            return items
+        except Exception:
+            logger.exception("Failed to batch save data to PostgreSQL")
             raise
     
     def get(self, table_name: str, data: dict):
         try:
             # Assuming data is a dict with column-value pairs for WHERE clause
-            conditions = ' AND '.join([f"{key} = %s" for key in data.keys()])
+            conditions = self._assignments(tuple(data), ' AND ')
             values = tuple(data.values())
             
             query = f"SELECT * FROM {table_name} WHERE {conditions}"
-            self.cursor.execute(query, values)
-            
-            columns = [desc[0] for desc in self.cursor.description]
-            row = self.cursor.fetchone()
+            with self.get_cursor(dict_rows=True) as cursor:
+                cursor.execute(query, values)
+                row = cursor.fetchone()
             
             if row:
-                return dict(zip(columns, row))
+                return row
             return None
-        except Exception as e:
-            logger.error(f"Failed to retrieve data from PostgreSQL: {str(e)}")
+        except Exception:
+            logger.exception("Failed to retrieve data from PostgreSQL")
+            raise
+    
+    def exists(self, table_name: str, key: dict) -> bool:
+        try:
+            conditions = self._assignments(tuple(key), ' AND ')
+            query = f"SELECT 1 FROM {table_name} WHERE {conditions} LIMIT 1"
+            
+            with self.get_cursor() as cursor:
+                cursor.execute(query, tuple(key.values()))
+                return cursor.fetchone() is not None
+        except Exception:
+            logger.exception("Failed to check existence in PostgreSQL")
             raise
     
     def delete(self, table_name: str, data: dict):
         try:
-            conditions = ' AND '.join([f"{key} = %s" for key in data.keys()])
+            conditions = self._assignments(tuple(data), ' AND ')
             values = tuple(data.values())
             
             query = f"DELETE FROM {table_name} WHERE {conditions}"
-            logger.info(f"Attempting to delete data from PostgreSQL: {data}")
             
-            self.cursor.execute(query, values)
-            self.connection.commit()
+            with self.get_cursor() as cursor:
+                cursor.execute(query, values)
             
-            logger.info(f"Successfully deleted data from PostgreSQL")
-        except Exception as e:
-            self.connection.rollback()
-            logger.error(f"Failed to delete data from PostgreSQL: {str(e)}")
+            logger.debug("Deleted rows from PostgreSQL table %s", table_name)
+        except Exception:
+            logger.exception("Failed to delete data from PostgreSQL")
             raise
         pass
 class DynamoDBStoreDataService(StoreDataInterface):
@@ -169,40 +302,108 @@ class DynamoDBStoreDataService(StoreDataInterface):
         if DynamoDBStoreDataService._initialized:
             return
             
+        _configure_logger()
         try:
+            # Imported here so the PostgreSQL backend never pays for loading boto3
+            import boto3
+            from boto3.dynamodb.types import TypeSerializer
+            from botocore.config import Config
+
+            # Keep pooled HTTPS connections alive between calls so requests
+            # don't pay a TCP+TLS handshake each time; adaptive retries back
+            # off on throttling
+            config = Config(
+                max_pool_connections=50,
+                retries={'max_attempts': 5, 'mode': 'adaptive'},
+                tcp_keepalive=True
+            )
             self.dynamodb = boto3.resource('dynamodb',
                                            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
                                            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                                           region_name=os.getenv('AWS_REGION'))
+                                           region_name=os.getenv('AWS_REGION'),
+                                           config=config)
+            # Plain client for batch writes: items are serialized once with
+            # TypeSerializer instead of through the resource layer's
+            # per-call parameter transformation. The resource's own
+            # meta.client can't be used, it has that transformation attached
+            self.client = boto3.client('dynamodb',
+                                       aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                                       aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                                       region_name=os.getenv('AWS_REGION'),
+                                       config=config)
+            self._serializer = TypeSerializer()
+            # Table resources by name, built once instead of on every call
+            self._tables = {}
             DynamoDBStoreDataService._initialized = True
             logger.info("DynamoDB connection initialized (singleton)")
-        except Exception as e:
-            logger.error(f"Failed to initialize DynamoDB connection: {str(e)}")
+        except Exception:
+            logger.exception("Failed to initialize DynamoDB connection")
             raise
 
+    def _table(self, table_name: str):
+        table = self._tables.get(table_name)
+        if table is None:
+            table = self._tables[table_name] = self.dynamodb.Table(table_name)
+        return table
+
     def save(self, table_name:str, data:dict):
         try:
-            self.table = self.dynamodb.Table(table_name)
-            item_data = data
-            logger.info(f"Attempting to save data to DynamoDB: {item_data}")
-            self.table.put_item(Item=item_data)  
-            logger.info(f"Successfully saved data to DynamoDB")
+            table = self._table(table_name)
+            table.put_item(Item=data)
+            logger.debug("Saved item to DynamoDB table %s", table_name)
             return data
         except Exception as e:
-            logger.error(f"Failed to save data to DynamoDB: {str(e)}")
+            # botocore is already loaded by the time a request has failed
+            from botocore.exceptions import ClientError
+
+            # No table check at startup; a missing table surfaces on first write
+            if isinstance(e, ClientError) and e.response['Error']['Code'] == 'ResourceNotFoundException':
+                logger.error("DynamoDB table %s does not exist", table_name)
+            else:
+                logger.exception("Failed to save data to DynamoDB")
             raise
     
+    # BatchWriteItem accepts at most 25 put requests per call
+    BATCH_WRITE_SIZE = 25
+    MAX_UNPROCESSED_RETRIES = 5
+
+    def batch_save(self, table_name: str, items: list):
+        try:
+            serialize = self._serializer.serialize
+            requests = [
+                {'PutRequest': {'Item': {name: serialize(value) for name, value in item.items()}}}
+                for item in items
+            ]
+            for start in range(0, len(requests), self.BATCH_WRITE_SIZE):
+                self._batch_write(table_name, requests[start:start + self.BATCH_WRITE_SIZE])
+            logger.debug("Saved %s items to DynamoDB table %s", len(items), table_name)
+            return items
+        except Exception:
+            logger.exception("Failed to batch save data to DynamoDB")
+            raise
+
+    def _batch_write(self, table_name: str, requests: list):
+        # Throttled writes come back as UnprocessedItems; resend them with backoff
+        pending = {table_name: requests}
+        for attempt in range(self.MAX_UNPROCESSED_RETRIES + 1):
+            response = self.client.batch_write_item(RequestItems=pending)
+            pending = response.get('UnprocessedItems')
+            if not pending:
+                return
+            if attempt < self.MAX_UNPROCESSED_RETRIES:
+                time.sleep(0.05 * 2 ** attempt)
+        unprocessed = len(pending.get(table_name, []))
+        raise RuntimeError(f"{unprocessed} items were not written to DynamoDB table {table_name}")
+    
     def update(self, table_name: str, key: dict, data: dict):
         try:
-            table = self.dynamodb.Table(table_name)
+            table = self._table(table_name)
             
             # Build update expression
             update_expression = "SET " + ", ".join([f"#{k} = :{k}" for k in data.keys()])
             expression_attribute_names = {f"#{k}": k for k in data.keys()}
             expression_attribute_values = {f":{k}": v for k, v in data.items()}
             
-            logger.info(f"Attempting to update data in DynamoDB: {data}")
-            
             table.update_item(
                 Key=key,
                 UpdateExpression=update_expression,
@@ -210,17 +411,28 @@ class DynamoDBStoreDataService(StoreDataInterface):
                 ExpressionAttributeValues=expression_attribute_values
             )
             
-            logger.info(f"Successfully updated data in DynamoDB")
+            logger.debug("Updated item in DynamoDB table %s", table_name)
             return data
-        except Exception as e:
-            logger.error(f"Failed to update data in DynamoDB: {str(e)}")
+        except Exception:
+            logger.exception("Failed to update data in DynamoDB")
             raise
     
     def get(self, table_name: str, data: dict):
-        table = self.dynamodb.Table(table_name)
+        table = self._table(table_name)
         response = table.get_item(Key=data)
         return response.get('Item')
     
+    def exists(self, table_name: str, key: dict) -> bool:
+        table = self._table(table_name)
+        # Only project the key attributes; the rest of the item is not needed
+        names = {f"#k{i}": k for i, k in enumerate(key)}
+        response = table.get_item(
+            Key=key,
+            ProjectionExpression=', '.join(names),
+            ExpressionAttributeNames=names
+        )
+        return 'Item' in response
+    
     def delete(self, table_name: str, data: dict):
-        table = self.dynamodb.Table(table_name)
+        table = self._table(table_name)
         table.delete_item(Key=data)
\ No newline at end of file
@@ -1,11 +1,12 @@
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+import hashlib
 import os
-from dotenv import load_dotenv
 from abc import ABC, abstractmethod
 import logging
 
-load_dotenv()
-
 class UploadService(ABC):
     """
     Abstract base class for file upload services.
@@ -30,6 +31,59 @@ class UploadService(ABC):
         """
         pass
     
+    @abstractmethod
+    def upload_fileobj(self, fileobj, object_name)->str:
+        """
+        Upload a readable binary file-like object to the storage service.
+        
+        Args:
+            fileobj: File-like object opened in binary mode
+            object_name (str): Name to give the file in the storage service
+            
+        Returns:
+            str: URL or path to the uploaded file
+            
+        Raises:
+            Exception: For upload errors
+        """
+        pass
+    
+    @staticmethod
+    def content_object_name(fileobj, extension: str = "") -> str:
+        """
+        Name a file after a hash of its content.
+        
+        The file is read once and rewound, so it can be uploaded right after.
+        
+        Args:
+            fileobj: Seekable file-like object opened in binary mode
+            extension (str): Extension to append, including the dot
+            
+        Returns:
+            str: Hex digest of the content followed by the extension
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk in iter(lambda: fileobj.read(1024 * 1024), b""):
+            digest.update(chunk)
+        fileobj.seek(0)
+        return f"{digest.hexdigest()}{extension}"
+    
+    def upload_content(self, fileobj, extension: str = "") -> str:
+        """
+        Upload a file under a name derived from its content.
+        
+        Identical files map to the same object, so re-sending an image
+        does not create a second copy.
+        
+        Args:
+            fileobj: Seekable file-like object opened in binary mode
+            extension (str): Extension to append, including the dot
+            
+        Returns:
+            str: URL or path to the uploaded file
+        """
+        return self.upload_fileobj(fileobj, self.content_object_name(fileobj, extension))
+    
     @abstractmethod
     def download_file(self, object_name, download_path):
         """
@@ -54,11 +108,26 @@ class AwsUploadService(UploadService):
         Initialize the AWS S3 client with credentials from environment variables.
         """
         try:
+            # Keep pooled HTTPS connections alive between uploads; the pool
+            # is larger than the transfer concurrency below
+            config = Config(
+                max_pool_connections=50,
+                retries={'max_attempts': 5, 'mode': 'adaptive'},
+                tcp_keepalive=True
+            )
             self.s3 = boto3.client('s3',
                                   aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
                                   aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                                  region_name=os.getenv('AWS_REGION'))
+                                  region_name=os.getenv('AWS_REGION'),
+                                  config=config)
             self.bucket_name = os.getenv('AWS_BUCKET_NAME')
+            # Public URL prefix of uploaded objects, built once
+            self.base_url = f"https://{self.bucket_name}.s3.{os.getenv('AWS_REGION')}.amazonaws.com"
+            self.transfer_config = TransferConfig(
+                multipart_threshold=8 * 1024 * 1024,
+                max_concurrency=10,
+                use_threads=True
+            )
             
             if not all([os.getenv('AWS_ACCESS_KEY_ID'), 
                         os.getenv('AWS_SECRET_ACCESS_KEY'), 
@@ -93,7 +162,7 @@ class AwsUploadService(UploadService):
             self.s3.upload_file(file_path, self.bucket_name, s3_key)
             
             # Generate the URL for the uploaded file
-            url = f"https://{self.bucket_name}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{s3_key}"
+            url = f"{self.base_url}/{s3_key}"
             return url
             
         except FileNotFoundError:
@@ -103,6 +172,63 @@ class AwsUploadService(UploadService):
             logging.error(f"Error uploading file to S3: {str(e)}")
             raise
     
+    def upload_fileobj(self, fileobj, object_name):
+        """
+        Upload a file-like object to AWS S3 without writing it to disk first.
+        
+        Large objects are sent as a multipart upload with parts transferred
+        concurrently.
+        
+        Args:
+            fileobj: File-like object opened in binary mode
+            object_name (str): Name to give the file in S3
+            
+        Returns:
+            str: URL to the uploaded file
+            
+        Raises:
+            Exception: For upload errors
+        """
+        try:
+            s3_key = f"uploads/tickets/{object_name}"
+            self.s3.upload_fileobj(fileobj, self.bucket_name, s3_key, Config=self.transfer_config)
+            
+            return f"{self.base_url}/{s3_key}"
+        except Exception as e:
+            logging.error(f"Error uploading file object to S3: {str(e)}")
+            raise
+    
+    def upload_content(self, fileobj, extension: str = ""):
+        """
+        Upload a file to AWS S3 under a name derived from its content.
+        
+        A HEAD request checks for the object first; when it already exists
+        the upload is skipped and its URL is returned. Concurrent uploads of
+        the same file may both PUT, which is harmless since the bytes match.
+        
+        Args:
+            fileobj: Seekable file-like object opened in binary mode
+            extension (str): Extension to append, including the dot
+            
+        Returns:
+            str: URL to the uploaded file
+            
+        Raises:
+            Exception: For upload errors
+        """
+        object_name = self.content_object_name(fileobj, extension)
+        s3_key = f"uploads/tickets/{object_name}"
+        try:
+            self.s3.head_object(Bucket=self.bucket_name, Key=s3_key)
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+                logging.error(f"Error checking for existing S3 object: {str(e)}")
+                raise
+            return self.upload_fileobj(fileobj, object_name)
+        
+        logging.info(f"Object already in S3, skipping upload: {s3_key}")
+        return f"{self.base_url}/{s3_key}"
+    
     def download_file(self, object_name, download_path):
         """
         Download a file from AWS S3.
@@ -130,8 +256,13 @@ class AwsUploadService(UploadService):
 class UploadServiceFactory:
     """
     Factory class for creating upload services.
+    Uses singleton pattern to cache the upload service instance.
     """
+    _instance = None
+    
     @staticmethod
     def create()->UploadService:
-        return AwsUploadService()
+        if UploadServiceFactory._instance is None:
+            UploadServiceFactory._instance = AwsUploadService()
+        return UploadServiceFactory._instance
 
@@ -5,53 +5,90 @@ import os
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
+# Entry point: read .env once, before the services below look up their settings
+from dotenv import load_dotenv
+load_dotenv()
+
+from telegram import Update
+from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram.request import HTTPXRequest
 from services.upload.upload import UploadServiceFactory
 from services.authentication.authenticate import AuthenticationService
 from services.store_data.store_data import ServiceType
 from entities.receipt import Receipt, ReceiptItem, ReceiptStatus
 from repositories.repository_factory import RepositoryFactory
 from jose import jwt
-from datetime import datetime, timedelta
-from gpt_extract import extract_receipt_text
+from datetime import datetime
+from gpt_extract import extract_receipt_text, shrink_image
 import os
 import logging
+import asyncio
 import io
-import tempfile
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 import json
 
+# orjson parses GPT replies several times faster; its JSONDecodeError
+# subclasses json.JSONDecodeError, so error handling is the same either way
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-ALLOWED_USERS = os.getenv("ALLOWED_USERS").split(",")
+# Telegram user IDs are ints; parse once so the membership check is a hash lookup
+ALLOWED_USERS = frozenset(int(user_id) for user_id in os.getenv("ALLOWED_USERS", "").split(",") if user_id.strip())
+
+# Connections kept open to api.telegram.org for Bot API calls
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", 32))
+
+# Worker threads for blocking calls (S3 uploads) offloaded with asyncio.to_thread
+BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", 10))
+
+# Outermost {...} span of a GPT reply; skips markdown fences and any text around the JSON
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Read the signing secret once; every token command needs it
+JWT_SECRET = os.getenv("JWT_SECRET")
+if not JWT_SECRET:
+    raise RuntimeError("JWT_SECRET environment variable is not set")
+
+# Issued tokens expire after 7 days
+TOKEN_TTL_SECONDS = 7 * 24 * 60 * 60
 
 # Initialize the services
 upload_service = UploadServiceFactory.create()
-auth_service = AuthenticationService(secret_key=os.getenv("JWT_SECRET"))
+auth_service = AuthenticationService(secret_key=JWT_SECRET)
 
 # Initialize repository (using PostgreSQL as configured in the original code)
 receipt_repository = RepositoryFactory.create_receipt_repository(service_type=ServiceType.POSTGRES)
 
+# Static replies
+START_MESSAGE = (
+    "Welcome to the Spends App Bot! 👋\n\n"
+    "I can help you with:\n"
+    "• Uploading photos to S3\n"
+    "• Managing authentication\n\n"
+    "Use /help to see all available commands."
+)
+HELP_MESSAGE = (
+    "Available commands:\n\n"
+    "/start - Start the bot\n"
+    "/help - Show this help message\n"
+    "You can also send me photos to upload them to S3."
+)
+
 # Define the start command handler
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        "Welcome to the Spends App Bot! 👋\n\n"
-        "I can help you with:\n"
-        "• Uploading photos to S3\n"
-        "• Managing authentication\n\n"
-        "Use /help to see all available commands."
-    )
+    await update.message.reply_text(START_MESSAGE)
 
 # Define the help command handler
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        "Available commands:\n\n"
-        "/start - Start the bot\n"
-        "/help - Show this help message\n"
-        "You can also send me photos to upload them to S3."
-    )
+    await update.message.reply_text(HELP_MESSAGE)
 
 # Define the generate token handler
 async def generate_token(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -62,11 +99,11 @@ async def generate_token(update: Update, context: ContextTypes.DEFAULT_TYPE):
     payload = {
         "sub": str(user_id),
         "username": username,
-        "exp": datetime.utcnow() + timedelta(days=7)  # Token expires in 7 days
+        "exp": int(time.time()) + TOKEN_TTL_SECONDS
     }
     
     # Generate the token
-    token = jwt.encode(payload, os.getenv("JWT_SECRET"), algorithm="HS256")
+    token = jwt.encode(payload, JWT_SECRET, algorithm="HS256")
     
     # Send the token to the user
     await update.message.reply_text(
@@ -108,10 +145,10 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
     """Process receipt photo upload with OCR extraction and status tracking.
     
     Workflow:
-    1. Upload photo to S3
-    2. Create receipt with PENDING status
+    1. Upload photo to S3 (GPT-4 Vision extraction starts in parallel)
+    2. Create receipt with PROCESSING status
     3. Notify user of successful upload
-    4. Extract data via GPT-4 Vision (status: PROCESSING)
+    4. Wait for the extracted data
     5. Update receipt with extracted data (status: COMPLETED or FAILED)
     6. Notify user of extraction results
     """
@@ -120,7 +157,7 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
     #     return
     
     receipt = None
-    temp_file_path = None
+    extraction = None
     
     try:
         # Get the photo file
@@ -128,17 +165,19 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
         
         file_data = io.BytesIO()
         await photo_file.download_to_memory(out=file_data)
-        file_data.seek(0)
+        # Downscale once up front, so both S3 and GPT get the smaller JPEG.
+        # Keep a reference to the bytes for extraction; the upload may close the buffer
+        image_bytes = await asyncio.to_thread(shrink_image, file_data.getvalue())
+        file_data = io.BytesIO(image_bytes)
         
-        # Create a temporary file to store the photo
-        file_extension = os.path.splitext(photo_file.file_path)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            temp_file.write(file_data.read())
-            temp_file_path = temp_file.name
+        # Extraction only needs the image bytes, so start the GPT call now
+        # and let it run while the photo is uploaded and the receipt recorded
+        extraction = asyncio.create_task(extract_receipt_text(image_bytes))
         
-        # Upload to S3
-        file_name = f"{update.message.photo[-1].file_id}{file_extension}"
-        url = upload_service.upload_file(temp_file_path, file_name)
+        # Upload to S3 straight from memory, named by content so a re-sent
+        # photo reuses the stored object; boto3 blocks, so keep it off the event loop
+        file_extension = os.path.splitext(photo_file.file_path)[1]
+        url = await asyncio.to_thread(upload_service.upload_content, file_data, file_extension)
         logger.info(f"Photo uploaded to S3: {url}")
         
         # Get user identifier
@@ -151,12 +190,14 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
         else:
             user = 'anonymous'
         
-        # Phase 1: Create receipt with PENDING status
-        receipt = Receipt(user_id=user, image_url=url, status=ReceiptStatus.PENDING)
-        receipt_repository.save(receipt)
-        logger.info(f"Receipt {receipt.receipt_id} created with PENDING status")
-        
-        # Notify user immediately - upload successful
+        # Phases 1-2: extraction is already running, so the receipt is
+        # written once, straight in PROCESSING status, instead of a PENDING
+        # insert followed by a status update. The user is only told it was
+        # uploaded once the row is actually written
+        new_receipt = Receipt(user_id=user, image_url=url, status=ReceiptStatus.PROCESSING)
+        await receipt_repository.asave(new_receipt)
+        # Only a written receipt is marked FAILED by the error handlers below
+        receipt = new_receipt
         await update.message.reply_text(
             f"✅ Receipt uploaded successfully!\n\n"
             f"Receipt ID: `{receipt.receipt_id}`\n"
@@ -164,38 +205,24 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
             f"Processing receipt data...",
             parse_mode="Markdown"
         )
+        logger.info(f"Receipt {receipt.receipt_id} created with PROCESSING status")
         
-        # Phase 2: Update status to PROCESSING and extract data
-        receipt_repository.update(receipt.receipt_id, status=ReceiptStatus.PROCESSING)
-        logger.info(f"Receipt {receipt.receipt_id} status updated to PROCESSING")
+        # Wait for the GPT-4 Vision extraction started after the download
+        logger.info(f"Extracting text from receipt: {url}")
         
-        # Extract text from the receipt image using GPT-4 Vision
-        file_full_path = os.path.join(os.getcwd(), temp_file_path)
-        logger.info(f"Extracting text from receipt: {file_full_path}")
-        
-        extracted_receipt = extract_receipt_text(file_full_path)
+        extracted_receipt = await extraction
         logger.info(f"GPT-4 extraction result: {extracted_receipt}")
         
-        # Clean and parse JSON response with multiple strategies
+        # Parse the JSON object out of the response in one pass; this also
+        # drops markdown code fences and any text around it
         receipt_formatted = None
-        
-        # Strategy 1: Remove markdown code blocks
-        cleaned = extracted_receipt.replace('```json', '').replace('```', '').strip()
-        
-        # Strategy 2: Try to find JSON in the response
-        try:
-            receipt_formatted = json.loads(cleaned)
-            logger.info(f"Parsed JSON successfully: {receipt_formatted}")
-        except json.JSONDecodeError:
-            # Strategy 3: Try to extract JSON from within the text
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', cleaned)
-            if json_match:
-                try:
-                    receipt_formatted = json.loads(json_match.group())
-                    logger.info(f"Extracted JSON from text: {receipt_formatted}")
-                except json.JSONDecodeError:
-                    pass
+        json_match = _JSON_OBJECT_RE.search(extracted_receipt)
+        if json_match:
+            try:
+                receipt_formatted = json_loads(json_match.group())
+                logger.info(f"Parsed JSON successfully: {receipt_formatted}")
+            except json.JSONDecodeError:
+                pass
         
         # If still no valid JSON, raise error with the raw response
         if not receipt_formatted:
@@ -203,26 +230,21 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
             raise json.JSONDecodeError("No valid JSON found in GPT response", extracted_receipt, 0)
         
         # Parse extracted items
-        items: list[ReceiptItem] = []
-        if 'items' in receipt_formatted:
-            for item in receipt_formatted['items']:
-                item_name = item.get('name', 'Unknown Item')
-                item_price = float(item.get('price', 0.0))
-                item_quantity = int(item.get('quantity', 1)) if 'quantity' in item else 1
-                item_category = item.get('category', 'other') if 'category' in item else 'other'
-                
-                items.append(ReceiptItem(
-                    name=item_name,
-                    price=item_price,
-                    quantity=item_quantity,
-                    category=item_category
-                ))
-        else:
+        items: list[ReceiptItem] = [
+            ReceiptItem(
+                name=item.get('name', 'Unknown Item'),
+                price=float(item.get('price', 0.0)),
+                quantity=int(item.get('quantity', 1)),
+                category=item.get('category', 'other')
+            )
+            for item in receipt_formatted.get('items', ())
+        ]
+        if 'items' not in receipt_formatted:
             logger.warning("No items found in extracted data")
         
         # Phase 3: Update receipt with extracted data and COMPLETED status
         total_amount = float(receipt_formatted.get('total', 0.0))
-        receipt_repository.update(
+        await receipt_repository.aupdate(
             receipt.receipt_id,
             purchase_date=datetime.now(),
             total_amount=total_amount,
@@ -231,10 +253,6 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
         )
         logger.info(f"Receipt {receipt.receipt_id} completed with {len(items)} items")
         
-        # Cleanup temp file
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         # Notify user of successful extraction
         items_summary = "\n".join([f"• {item.name}: ${item.price:.2f}" for item in items[:5]])
         if len(items) > 5:
@@ -254,7 +272,7 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
         logger.error(f"Failed to parse GPT response: {e}")
         # Update receipt status to FAILED
         if receipt:
-            receipt_repository.update(receipt.receipt_id, status=ReceiptStatus.FAILED)
+            await receipt_repository.aupdate(receipt.receipt_id, status=ReceiptStatus.FAILED)
         await update.message.reply_text(
             f"❌ Failed to parse receipt data.\n\n"
             f"Receipt ID: `{receipt.receipt_id if receipt else 'N/A'}`\n"
@@ -267,7 +285,7 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
         # Update receipt status to FAILED if it was created
         if receipt:
             try:
-                receipt_repository.update(receipt.receipt_id, status=ReceiptStatus.FAILED)
+                await receipt_repository.aupdate(receipt.receipt_id, status=ReceiptStatus.FAILED)
             except Exception as update_error:
                 logger.error(f"Failed to update receipt status: {update_error}")
         
@@ -278,12 +296,9 @@ async def process_receipt_upload(update: Update, context: ContextTypes.DEFAULT_T
             parse_mode="Markdown"
         )
     finally:
-        # Ensure temp file cleanup
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except Exception as cleanup_error:
-                logger.warning(f"Failed to cleanup temp file: {cleanup_error}")
+        # Stop the extraction if an earlier step failed; no-op once it finished
+        if extraction is not None:
+            extraction.cancel()
 
 # Authenticate the user
 async def authenticate_user(update: Update, context: ContextTypes.DEFAULT_TYPE)->bool:
@@ -294,10 +309,48 @@ async def authenticate_user(update: Update, context: ContextTypes.DEFAULT_TYPE)-
     
     
 
+# Give the bot's event loop a bounded pool for blocking work
+async def configure_executor(application):
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io")
+    )
+
 # Define the main function
 def main():
-    # Initialize the application
-    application = ApplicationBuilder().token(os.getenv("TELEGRAM_BOT_TOKEN")).build()
+    # uvloop cuts event loop overhead for the many concurrent HTTPS calls;
+    # it is optional (not available on Windows), so fall back to asyncio's loop
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+    
+    # Bot API calls (get_file, downloads, replies) share one pooled HTTP
+    # client; the default pool is too small for concurrent photo uploads.
+    # HTTP/2 multiplexes concurrent calls over one kept-alive connection.
+    # getUpdates keeps its own client so long polling never holds a slot.
+    request = HTTPXRequest(
+        connection_pool_size=TELEGRAM_POOL_SIZE,
+        read_timeout=30,
+        connect_timeout=10,
+        pool_timeout=10,
+        http_version="2"
+    )
+    
+    # Initialize the application; updates are handled concurrently so one
+    # slow receipt doesn't hold up other users
+    application = (
+        ApplicationBuilder()
+        .token(os.getenv("TELEGRAM_BOT_TOKEN"))
+        .request(request)
+        .concurrent_updates(True)
+        .post_init(configure_executor)
+        .build()
+    )
+    
+    # Handlers are checked in registration order and the first match wins,
+    # so the receipt photo handler - the bulk of the traffic - goes first
+    application.add_handler(MessageHandler(filters.PHOTO, process_receipt_upload))
     
     # Add command handlers
     application.add_handler(CommandHandler("start", start))
@@ -305,9 +358,6 @@ def main():
     application.add_handler(CommandHandler("generate_token", generate_token))
     application.add_handler(CommandHandler("verify_token", verify_token))
     
-    # Add the receipt processing handler
-    application.add_handler(MessageHandler(filters.PHOTO, process_receipt_upload))
-    
     # Start the bot
     logger.info("Starting the bot...")
     application.run_polling()
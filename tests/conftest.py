@@ -0,0 +1,10 @@
+"""
+Global test configuration.
+"""
+
+import os
+import sys
+
+# Make the application packages importable however pytest is started,
+# once for the whole suite rather than in each test module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -1 +0,0 @@
-# Tests for repositories
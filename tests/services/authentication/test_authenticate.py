@@ -1,69 +1,68 @@
 import pytest
-from fastapi import HTTPException
-from jose import jwt
-from datetime import datetime, timedelta
-import os
-from services.authentication.authenticate import AuthenticationService
+from datetime import datetime, timedelta, timezone
 
-# Set up environment variable for testing
-os.environ["JWT_SECRET_KEY"] = "test_secret_key"
+# jose, fastapi and the service are imported inside the tests, so collecting
+# this module (e.g. pytest --collect-only) does not pay for loading them
 
-@pytest.fixture
+SECRET_KEY = "test_secret_key"
+
+# The service holds no per-test state besides its verified-token cache,
+# which only ever holds valid tokens, so one instance serves every test
+@pytest.fixture(scope="session")
 def auth_service():
-    return AuthenticationService(secret_key="test_secret_key")
+    from services.authentication.authenticate import AuthenticationService
+    return AuthenticationService(secret_key=SECRET_KEY)
 
-def test_authenticate_valid_token(auth_service):
-    # Create a valid token
-    payload = {
-        "sub": "test_user",
-        "exp": datetime.utcnow() + timedelta(minutes=30)
-    }
-    token = jwt.encode(payload, auth_service.secret_key, algorithm=auth_service.algorithm)
+@pytest.fixture(scope="session")
+def tokens(auth_service):
+    """Sign every test token once per session"""
+    from jose import jwt
+    
+    now = datetime.now(timezone.utc)
     
+    # Signed with the literal secret, not the service's own copy, so the
+    # tests fail if the service stops using the key it was given
+    def sign(exp, secret=SECRET_KEY):
+        return jwt.encode({"sub": "test_user", "exp": exp}, secret, algorithm=auth_service.algorithm)
+    
+    return {
+        "valid": sign(now + timedelta(minutes=30)),
+        "wrong_secret": sign(now + timedelta(minutes=30), secret="wrong_secret_key"),
+        # A fixed past instant is expired however slow or skewed the host is
+        "expired": sign(datetime(2024, 1, 1, tzinfo=timezone.utc)),
+        "malformed": "not.a.valid.token",
+    }
+
+def test_authenticate_valid_token(auth_service, tokens):
     # Test authentication
-    result = auth_service.authenticate(token)
+    result = auth_service.authenticate(tokens["valid"])
     
     # Verify the result
     assert result is not None
     assert result["sub"] == "test_user"
 
-def test_authenticate_invalid_token(auth_service):
-    # Create an invalid token with wrong secret key
-    payload = {
-        "sub": "test_user",
-        "exp": datetime.utcnow() + timedelta(minutes=30)
-    }
-    token = jwt.encode(payload, "wrong_secret_key", algorithm=auth_service.algorithm)
+@pytest.mark.parametrize("name", ["wrong_secret", "expired", "malformed"])
+def test_authenticate_rejects_token(auth_service, tokens, name):
+    from fastapi import HTTPException
     
     # Test authentication should raise an exception
     with pytest.raises(HTTPException) as excinfo:
-        auth_service.authenticate(token)
+        auth_service.authenticate(tokens[name])
     
     assert excinfo.value.status_code == 401
     assert excinfo.value.detail == "Invalid token"
 
-def test_authenticate_expired_token(auth_service):
-    # Create an expired token
-    payload = {
-        "sub": "test_user",
-        "exp": datetime.utcnow() - timedelta(minutes=30)  # Expired 30 minutes ago
-    }
-    token = jwt.encode(payload, auth_service.secret_key, algorithm=auth_service.algorithm)
+def test_authenticate_caches_verified_token(auth_service, tokens, monkeypatch):
+    from jose import jwt
     
-    # Test authentication should raise an exception
-    with pytest.raises(HTTPException) as excinfo:
-        auth_service.authenticate(token)
-    
-    assert excinfo.value.status_code == 401
-    assert excinfo.value.detail == "Invalid token"
+    # The service is shared by the session; start from an empty cache so
+    # the first call below is a real verification
+    auth_service._verified.clear()
+    first = auth_service.authenticate(tokens["valid"])
 
-def test_authenticate_malformed_token(auth_service):
-    # Test with a malformed token
-    malformed_token = "not.a.valid.token"
-    
-    # Test authentication should raise an exception
-    with pytest.raises(HTTPException) as excinfo:
-        auth_service.authenticate(malformed_token)
-    
-    assert excinfo.value.status_code == 401
-    assert excinfo.value.detail == "Invalid token" 
\ No newline at end of file
+    # A cache hit must not verify the signature again
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token was decoded twice")
+    monkeypatch.setattr(jwt, "decode", fail_decode)
+
+    assert auth_service.authenticate(tokens["valid"]) == first